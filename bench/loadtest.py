@@ -0,0 +1,434 @@
+"""
+Offline load test for the Music and InteractionHandler cogs.
+
+Drives N simulated guilds through /play, queued plays and now-playing button
+clicks against fake voice, search and yt-dlp backends with configurable
+latencies. Nothing touches the network or spawns FFmpeg.
+
+    python bench/loadtest.py
+    python bench/loadtest.py --guilds 1 10 100 1000 --extract-latency 0.2
+
+Reports commands/sec, event-loop lag, time-to-first-audio (command start to
+the first audio frame read) and traced memory per guild.
+"""
+
+import os
+import sys
+import time
+import types
+import asyncio
+import logging
+import argparse
+import itertools
+import threading
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Locale files are read relative to the working directory.
+os.chdir(ROOT)
+
+import discord
+
+import config
+
+config.EXTRACTOR_BACKEND = "thread"
+config.DISK_CACHE_ENABLED = False
+config.QUEUE_DB_FILE = ":memory:"
+
+# Backend latencies in seconds, set from the command line.
+LATENCY = {"search": 0.05, "extract": 0.05}
+
+_ids = itertools.count()
+
+
+# Fake backends, installed before the cogs first import them
+
+
+class FakeVideosSearch:
+    def __init__(self, keyword, limit=1):
+        self.keyword = keyword
+        self.limit = limit
+
+    def result(self):
+        time.sleep(LATENCY["search"])
+        return {
+            "result": [
+                {
+                    "id": f"vid{next(_ids):08d}",
+                    "title": f"{self.keyword} #{index}",
+                    "duration": "3:30",
+                    "channel": {"name": "Bench"},
+                    "thumbnails": [{"url": "https://example.invalid/thumb.jpg"}],
+                }
+                for index in range(self.limit)
+            ]
+        }
+
+
+class FakeYoutubeDL:
+    def __init__(self, options=None):
+        self.options = options or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, url, download=False, process=True):
+        time.sleep(LATENCY["extract"])
+        video_id = url.rsplit("=", 1)[-1]
+        expire = int(time.time()) + 6 * 3600
+        return {
+            "id": video_id,
+            "title": video_id,
+            "url": f"https://example.invalid/{video_id}?expire={expire}",
+            "acodec": "opus",
+        }
+
+    def sanitize_info(self, data):
+        return data
+
+    def prepare_filename(self, data):
+        return f"{data['id']}.m4a"
+
+
+class FakeAudio(discord.AudioSource):
+    """Stands in for FFmpegPCMAudio: 20ms of silence per read, no subprocess."""
+
+    FRAME = b"\0" * 3840
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def read(self):
+        return self.FRAME
+
+    def is_opus(self):
+        return False
+
+
+sys.modules["youtubesearchpython"] = types.SimpleNamespace(
+    VideosSearch=FakeVideosSearch
+)
+sys.modules["yt_dlp"] = types.SimpleNamespace(
+    YoutubeDL=FakeYoutubeDL, utils=types.SimpleNamespace()
+)
+discord.FFmpegPCMAudio = FakeAudio
+
+from cogs.music import Music
+from cogs.interactions import InteractionHandler
+
+# Fake Discord objects: just the surface the cogs use
+
+
+class FakeVoiceClient:
+    """Plays each source on its own thread, like discord.py's AudioPlayer."""
+
+    def __init__(self, guild, track_seconds):
+        self.guild = guild
+        self.channel = types.SimpleNamespace(id=guild.id * 10, guild=guild)
+        self.track_seconds = track_seconds
+        self.source = None
+        self.first_audio_at = None
+        self._connected = True
+        self._paused = False
+        self._stop = None
+
+    def play(self, source, *, after=None):
+        self.source = source
+        self._paused = False
+        self._stop = stop = threading.Event()
+        threading.Thread(
+            target=self._run, args=(source, after, stop), daemon=True
+        ).start()
+
+    def _run(self, source, after, stop):
+        source.read()
+        if self.first_audio_at is None:
+            self.first_audio_at = time.perf_counter()
+        stop.wait(self.track_seconds)
+        if self._stop is stop:
+            self._stop = None
+        if after is not None:
+            after(None)
+
+    def is_playing(self):
+        return self._stop is not None and not self._paused
+
+    def is_paused(self):
+        return self._stop is not None and self._paused
+
+    def is_connected(self):
+        return self._connected
+
+    def pause(self):
+        self._paused = True
+
+    def resume(self):
+        self._paused = False
+
+    def stop(self):
+        if self._stop is not None:
+            self._stop.set()
+
+    async def disconnect(self, *, force=False):
+        self.stop()
+        self._connected = False
+        self.guild.voice_client = None
+
+
+class FakeMessage:
+    def __init__(self, channel):
+        self.id = next(_ids)
+        self.channel = channel
+        self.guild = channel.guild
+
+    async def edit(self, **kwargs):
+        pass
+
+    async def delete(self):
+        pass
+
+
+class FakeTyping:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeChannel:
+    def __init__(self, guild):
+        self.id = guild.id * 10 + 1
+        self.guild = guild
+
+    async def send(self, *args, **kwargs):
+        return FakeMessage(self)
+
+    def typing(self):
+        return FakeTyping()
+
+
+class FakeGuild:
+    def __init__(self, guild_id, me):
+        self.id = guild_id
+        self.me = me
+        self.voice_client = None
+        self.text_channel = FakeChannel(self)
+
+
+class FakeUser:
+    bot = False
+
+    def __init__(self, user_id):
+        self.id = user_id
+        self.mention = f"<@{user_id}>"
+        self.voice = types.SimpleNamespace(channel=None)
+
+
+class FakeContext:
+    interaction = None
+
+    def __init__(self, guild, author):
+        self.guild = guild
+        self.author = author
+        self.channel = guild.text_channel
+        self.message = None
+        self.send = self.channel.send
+        self.typing = self.channel.typing
+
+    @property
+    def voice_client(self):
+        return self.guild.voice_client
+
+
+class FakeResponse:
+    async def defer(self, **kwargs):
+        pass
+
+    async def send_message(self, *args, **kwargs):
+        pass
+
+    async def edit_message(self, **kwargs):
+        pass
+
+    def is_done(self):
+        return False
+
+
+class FakeInteraction:
+    type = discord.InteractionType.component
+
+    def __init__(self, client, guild, user, message, custom_id):
+        self.id = next(_ids)
+        self.client = client
+        self.guild = guild
+        self.guild_id = guild.id
+        self.user = user
+        self.message = message
+        self.channel = guild.text_channel
+        self.data = {"custom_id": custom_id}
+        self.response = FakeResponse()
+
+
+class FakeBot:
+    def __init__(self, loop):
+        self.loop = loop
+        self.user = FakeUser(1)
+        self.guilds_by_id = {}
+        self.cogs = {}
+
+    def get_cog(self, name):
+        return self.cogs.get(name)
+
+    def get_guild(self, guild_id):
+        return self.guilds_by_id.get(guild_id)
+
+    async def get_context(self, origin):
+        return FakeContext(origin.guild, getattr(origin, "user", self.user))
+
+    async def is_owner(self, user):
+        return True
+
+
+# Workload
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def monitor_loop_lag(samples, interval=0.01):
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - started - interval)
+
+
+BUTTONS = ("show_queue", "pause_resume", "pause_resume", "loop", "loop", "skip")
+
+
+async def drive_guild(bot, music, interactions, guild, plays):
+    """Play, queue `plays - 1` more tracks, then click through the buttons."""
+    user = FakeUser(guild.id + 1)
+    ctx = FakeContext(guild, user)
+    started = time.perf_counter()
+    for index in range(plays):
+        await music.play_command(ctx, f"guild {guild.id} song {index}")
+    player = music.players.get(guild.id)
+    for custom_id in BUTTONS:
+        message = player.now_playing_message or FakeMessage(guild.text_channel)
+        interaction = FakeInteraction(bot, guild, user, message, custom_id)
+        await interactions.handle_interaction(interaction)
+    return started, plays + len(BUTTONS)
+
+
+async def run(guild_count, plays, track_seconds, trace_memory):
+    loop = asyncio.get_running_loop()
+    bot = FakeBot(loop)
+    music = bot.cogs["Music"] = Music(bot)
+    interactions = bot.cogs["InteractionHandler"] = InteractionHandler(bot)
+
+    if trace_memory:
+        tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0] if trace_memory else 0
+
+    guilds = []
+    for guild_id in range(1000, 1000 + guild_count):
+        guild = bot.guilds_by_id[guild_id] = FakeGuild(guild_id, bot.user)
+        guild.voice_client = FakeVoiceClient(guild, track_seconds)
+        guilds.append(guild)
+
+    lag = []
+    monitor = asyncio.create_task(monitor_loop_lag(lag))
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(drive_guild(bot, music, interactions, guild, plays) for guild in guilds)
+    )
+    elapsed = time.perf_counter() - started
+    monitor.cancel()
+
+    memory = 0
+    if trace_memory:
+        memory = (tracemalloc.get_traced_memory()[0] - baseline) / guild_count
+        tracemalloc.stop()
+
+    first_audio = [
+        guild.voice_client.first_audio_at - guild_started
+        for guild, (guild_started, _) in zip(guilds, results)
+        if guild.voice_client and guild.voice_client.first_audio_at
+    ]
+    commands = sum(count for _, count in results)
+
+    for guild in guilds:
+        if guild.voice_client is not None:
+            await guild.voice_client.disconnect()
+        music.players.discard(guild.id)
+
+    return {
+        "guilds": guild_count,
+        "commands": commands,
+        "commands_per_sec": commands / elapsed,
+        "lag_p50": percentile(lag, 0.5),
+        "lag_p99": percentile(lag, 0.99),
+        "lag_max": max(lag, default=0.0),
+        "ttfa_p50": percentile(first_audio, 0.5),
+        "ttfa_p99": percentile(first_audio, 0.99),
+        "memory_per_guild": memory,
+    }
+
+
+def print_report(rows):
+    header = (
+        f"{'guilds':>7} {'cmds':>7} {'cmd/s':>8} {'lag p50':>9} {'lag p99':>9} "
+        f"{'lag max':>9} {'ttfa p50':>9} {'ttfa p99':>9} {'KiB/guild':>10}"
+    )
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(
+            f"{row['guilds']:>7} {row['commands']:>7} {row['commands_per_sec']:>8.1f} "
+            f"{row['lag_p50'] * 1000:>7.1f}ms {row['lag_p99'] * 1000:>7.1f}ms "
+            f"{row['lag_max'] * 1000:>7.1f}ms {row['ttfa_p50']:>8.2f}s "
+            f"{row['ttfa_p99']:>8.2f}s {row['memory_per_guild'] / 1024:>10.1f}"
+        )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline load test for the bot")
+    parser.add_argument("--guilds", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--plays", type=int, default=5, help="plays per guild")
+    parser.add_argument("--search-latency", type=float, default=LATENCY["search"])
+    parser.add_argument("--extract-latency", type=float, default=LATENCY["extract"])
+    parser.add_argument(
+        "--track-seconds", type=float, default=30.0, help="length of each fake track"
+    )
+    parser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="skip tracemalloc, which slows everything else down",
+    )
+    return parser.parse_args(argv)
+
+
+async def main(args):
+    rows = []
+    for guild_count in args.guilds:
+        rows.append(
+            await run(guild_count, args.plays, args.track_seconds, not args.no_memory)
+        )
+    print_report(rows)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    LATENCY["search"] = args.search_latency
+    LATENCY["extract"] = args.extract_latency
+    logging.basicConfig(level=logging.ERROR)
+    asyncio.run(main(args))
@@ -4,8 +4,14 @@ import logging
 import discord
 from discord.ext import commands
 
+from utils.logs import bind_log_context
+
 logger = logging.getLogger(__name__)
 
+# Components whose callbacks live on their own View (queue paging, search
+# results) use this prefix; discord.py dispatches them, so they are skipped here.
+VIEW_CUSTOM_ID_PREFIX = "view:"
+
 
 class InteractionHandler(commands.Cog):
 
@@ -22,6 +28,9 @@ class InteractionHandler(commands.Cog):
     @commands.Cog.listener()
     async def on_interaction(self, interaction: discord.Interaction):
         if interaction.type == discord.InteractionType.component:
+            bind_log_context(
+                guild_id=interaction.guild_id, interaction_id=interaction.id
+            )
             await self.handle_interaction(interaction)
 
     async def handle_interaction(self, interaction: discord.Interaction):
@@ -30,6 +39,9 @@ class InteractionHandler(commands.Cog):
             logger.error("Component interaction does not contain custom_id.")
             return
 
+        if custom_id.startswith(VIEW_CUSTOM_ID_PREFIX):
+            return
+
         handler = self.interaction_handlers.get(custom_id)
         if handler:
             await self._execute_handler(handler, interaction)
@@ -39,8 +51,9 @@ class InteractionHandler(commands.Cog):
     async def _execute_handler(self, handler, interaction):
         try:
             music_cog = interaction.client.get_cog("Music")
+            player = music_cog.players.get(interaction.guild_id)
             ctx = await interaction.client.get_context(interaction.message)
-            await handler(interaction, music_cog, ctx)
+            await handler(interaction, music_cog, player, ctx)
         except discord.errors.InteractionResponded:
             logger.warning(
                 f"Interaction {interaction.id} has already been responded to."
@@ -48,7 +61,7 @@ class InteractionHandler(commands.Cog):
         except Exception as e:
             logger.error(f"Error handling interaction {interaction.id}: {e}")
 
-    async def handle_pause_resume(self, interaction, music_cog, ctx):
+    async def handle_pause_resume(self, interaction, music_cog, player, ctx):
         voice_client = interaction.guild.voice_client
         if voice_client.is_playing():
             voice_client.pause()
@@ -57,32 +70,33 @@ class InteractionHandler(commands.Cog):
             voice_client.resume()
             action = "resumed"
 
-        await music_cog.send_now_playing(ctx, music_cog.current)
+        await music_cog.refresh_now_playing(interaction, ctx)
 
-    async def handle_skip(self, interaction, music_cog, ctx):
-        if music_cog.now_playing_message:
-            await music_cog.now_playing_message.delete()
-        music_cog.now_playing_message = None
+    async def handle_skip(self, interaction, music_cog, player, ctx):
+        # The now-playing message is edited in place once the next track starts.
+        await interaction.response.defer()
         if ctx.voice_client and ctx.voice_client.is_playing():
             ctx.voice_client.stop()
 
-    async def handle_stop(self, interaction, music_cog, ctx):
+    async def handle_stop(self, interaction, music_cog, player, ctx):
         if (
             interaction.guild.voice_client
             and interaction.guild.voice_client.is_connected()
         ):
-            if music_cog.now_playing_message:
-                await music_cog.now_playing_message.delete()
-                music_cog.now_playing_message = None
+            if player.now_playing_message:
+                await player.now_playing_message.delete()
+                player.now_playing_message = None
             await interaction.guild.voice_client.disconnect()
+        music_cog.players.discard(interaction.guild_id)
 
-    async def handle_loop(self, interaction, music_cog, ctx):
-        music_cog.loop = not music_cog.loop
-        await music_cog.send_now_playing(ctx, music_cog.current)
+    async def handle_loop(self, interaction, music_cog, player, ctx):
+        player.loop = not player.loop
+        await music_cog.refresh_now_playing(interaction, ctx)
 
-    async def handle_show_queue(self, interaction, music_cog, ctx):
+    async def handle_show_queue(self, interaction, music_cog, player, ctx):
         await interaction.response.defer()
-        await music_cog.send_queue(ctx)
+        # ctx comes from the now-playing message; answer in the clicker's locale.
+        await music_cog.send_queue(ctx, music_cog.get_user_locale(interaction))
 
 
 async def setup(bot):
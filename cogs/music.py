@@ -1,34 +1,301 @@
+import os
+import time
 import asyncio
 import logging
-from youtubesearchpython import VideosSearch
 
 from typing import List, Optional
 
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 from discord.ui import View, Button
 
-from utils.utils import ellipsis, get_translation
-from utils.ytdl import YTDLSource
+from config import (
+    SEARCH_CACHE_TTL,
+    SEARCH_CACHE_SIZE,
+    PREFETCH_FFMPEG,
+    AUDIO_MODE,
+    TRACK_END_SLOW_SECONDS,
+    NOW_PLAYING_DEBOUNCE,
+    PLAYLIST_BATCH_SIZE,
+    UNPLAYABLE_SKIP_LIMIT,
+    PLAYLIST_MAX_TRACKS,
+    DISK_CACHE_MAX_DURATION,
+    METRICS_FILE,
+    METRICS_DUMP_INTERVAL,
+    QUEUE_DB_FILE,
+    QUEUE_PERSIST_INTERVAL,
+    QUEUE_RESTORE_DELAY,
+    IDLE_DISCONNECT_SECONDS,
+    ALONE_DISCONNECT_SECONDS,
+    REAPER_INTERVAL,
+    SUGGEST_HISTORY_SIZE,
+    SUGGEST_RESULTS_SIZE,
+)
+from cogs.interactions import VIEW_CUSTOM_ID_PREFIX
+from utils.cache import is_fresh
+from utils.metrics import metrics, write_atomic
+from utils.persistence import QueueStore
+from utils.shards import instance_path
+from utils.player import PlayerManager
+from utils.search import SearchService
+from utils.suggest import SuggestionService
+from utils.track import Track
+from utils.utils import ellipsis
+from utils.i18n import get_translation, locale_resolver
+from utils.ytdl import (
+    YTDLSource,
+    extractor,
+    stream_cache,
+    disk_cache,
+    is_playlist_url,
+    live_sources,
+)
 
 logger = logging.getLogger(__name__)
 
+# Titles yt-dlp gives flat playlist entries that can no longer be played.
+UNAVAILABLE_TITLES = ("[Private video]", "[Deleted video]")
+
+
+class ResumeContext:
+    """Stands in for a command context when playback resumes after a restart."""
+
+    interaction = None
+    message = None
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = channel.guild.me
+        self.send = channel.send
+        self.typing = channel.typing
+
+    @property
+    def voice_client(self):
+        return self.guild.voice_client
+
 
 class Music(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.loop = False
-        self.current = None
-        self.queue = []
-        self.now_playing_message = None
+        # Players and the search cache live on the bot so they outlive a reload.
+        self.players = getattr(bot, "players", None)
+        if self.players is None:
+            self.players = bot.players = PlayerManager(
+                audio_mode=AUDIO_MODE, on_track_end=self.on_track_end
+            )
+        else:
+            self.players.rebind(self.on_track_end)
+        self.search = getattr(bot, "search_service", None)
+        if self.search is None:
+            self.search = bot.search_service = SearchService(
+                ttl=SEARCH_CACHE_TTL, max_entries=SEARCH_CACHE_SIZE
+            )
+        self.suggestions = getattr(bot, "suggestions", None)
+        if self.suggestions is None:
+            self.suggestions = bot.suggestions = SuggestionService(
+                history_size=SUGGEST_HISTORY_SIZE, results_size=SUGGEST_RESULTS_SIZE
+            )
+        self.queue_store = getattr(bot, "queue_store", None)
+        if self.queue_store is None:
+            self.queue_store = bot.queue_store = QueueStore(QUEUE_DB_FILE)
+        # Fire-and-forget tasks, held until done so they can't be garbage collected.
+        self.background_tasks = getattr(bot, "background_tasks", None)
+        if self.background_tasks is None:
+            self.background_tasks = bot.background_tasks = set()
+        # Each shard process dumps its own metrics file.
+        self.metrics_file = instance_path(METRICS_FILE, getattr(bot, "instance", None))
+
+    def get_player(self, ctx):
+        return self.players.get(ctx.guild.id)
+
+    async def cog_load(self):
+        extractor.warm()
+        self.dump_metrics.start()
+        self.persist_queues.start()
+        self.reap_idle.start()
+        if self.queue_store.restore_task is None:
+            self.queue_store.restore_task = asyncio.create_task(self.restore_queues())
+
+    async def cog_unload(self):
+        self.dump_metrics.cancel()
+        self.persist_queues.cancel()
+        self.reap_idle.cancel()
+        # On reload, keep the worker pool (and any extraction in flight) alive.
+        if not getattr(self.bot, "reloading", False):
+            extractor.close()
+            # Runs before voice disconnects on shutdown, so queues survive it.
+            await self.queue_store.sync(self.players, self.bot)
+            self.queue_store.close()
+            self.bot.queue_store = None
+
+    @tasks.loop(seconds=QUEUE_PERSIST_INTERVAL)
+    async def persist_queues(self):
+        await self.queue_store.sync(self.players, self.bot)
+
+    async def restore_queues(self):
+        """
+        Resume the queues saved before the last shutdown, one guild at a time
+        so a restart doesn't open every voice connection at once.
+        """
+        await self.bot.wait_until_ready()
+        try:
+            saved = await self.queue_store.load()
+        except Exception as e:
+            logger.error(f"Failed to load saved queues: {e}")
+            return
 
-    async def create_player(self, url):
-        return await YTDLSource.from_url(url, loop=self.bot.loop, stream=True)
+        for state in saved:
+            guild = self.bot.get_guild(state.guild_id)
+            if guild is None:
+                # Owned by another shard process, or the bot left the guild.
+                continue
+            try:
+                resumed = await self.resume_guild(guild, state)
+            except Exception as e:
+                logger.warning(f"Failed to resume queue in guild {guild.id}: {e}")
+                resumed = False
+            if not resumed:
+                await self.queue_store.forget(guild.id)
+                continue
+            await asyncio.sleep(QUEUE_RESTORE_DELAY)
+
+    async def resume_guild(self, guild, state):
+        voice_channel = guild.get_channel(state.voice_channel_id or 0)
+        text_channel = guild.get_channel(state.text_channel_id or 0)
+        if voice_channel is None or text_channel is None:
+            return False
+        if not any(not member.bot for member in voice_channel.members):
+            return False
+        if guild.voice_client is not None or self.players.peek(guild.id):
+            return False
+
+        player = self.players.get(guild.id)
+        player.loop = state.loop
+        player.volume = state.volume
+        player.audio_mode = state.audio_mode
+        player.queue.extend(state.queue)
+        current = state.current or player.queue.popleft()
+
+        await voice_channel.connect()
+        ctx = ResumeContext(text_channel)
+        # Saved tracks carry their metadata, so there is no search to redo.
+        await self.play_url(ctx, current)
+        logger.info(f"Resumed {len(player.queue) + 1} tracks in guild {guild.id}")
+        return True
+
+    def cache_stats(self):
+        caches = {"search": self.search.stats(), "stream": stream_cache.stats()}
+        if disk_cache is not None:
+            caches["disk"] = disk_cache.stats()
+        return caches
+
+    def cache_gauges(self):
+        return {
+            f"playground_cache_{name}_{key}": value
+            for name, stats in self.cache_stats().items()
+            for key, value in stats.items()
+        }
+
+    @tasks.loop(seconds=METRICS_DUMP_INTERVAL)
+    async def dump_metrics(self):
+        text = metrics.render_prometheus(self.cache_gauges())
+        try:
+            await self.bot.loop.run_in_executor(
+                None, write_atomic, self.metrics_file, text
+            )
+        except OSError as e:
+            logger.warning(f"Failed to write metrics to {self.metrics_file}: {e}")
+
+    def record_first_audio(self, guild_id, started, command_started):
+        now = time.perf_counter()
+        metrics.observe("first_audio", now - started, guild_id)
+        if command_started is not None:
+            metrics.observe("command_to_audio", now - command_started, guild_id)
+
+    async def create_player(
+        self, track, volume=0.2, mode="pcm", guild_id=None, timeout=None
+    ):
+        if disk_cache is not None:
+            path = disk_cache.lookup(track.id)
+            if path is not None:
+                data = {"id": track.id, "title": track.title, "url": path}
+                with metrics.timer("ffmpeg_spawn", guild_id, source="disk"):
+                    return YTDLSource.from_file(path, data=data, volume=volume)
+
+        data = track.stream
+        if data is None or not is_fresh(data):
+            data = await YTDLSource.resolve(
+                track.url, guild_id=guild_id, timeout=timeout
+            )
+        with metrics.timer("ffmpeg_spawn", guild_id, mode=mode):
+            return YTDLSource.from_data(data, volume=volume, mode=mode)
+
+    @staticmethod
+    def interaction_timeout(ctx):
+        """Seconds until the interaction behind `ctx` can no longer be answered."""
+        interaction = getattr(ctx, "interaction", None)
+        if interaction is None:
+            return None
+        return (interaction.expires_at - discord.utils.utcnow()).total_seconds()
+
+    def schedule_prefetch(self, player):
+        """Resolve the head of the queue while the current track plays."""
+        if not player.queue:
+            player.invalidate_prefetch()
+            return
+        url = player.queue[0].url
+        if player.prefetch_url == url:
+            return
+        player.invalidate_prefetch()
+        player.prefetch_url = url
+        player.prefetch_task = asyncio.create_task(self.prefetch(player, url))
+
+    async def await_prefetch(self, player, url, timeout=None):
+        """
+        Wait for a prefetch of `url` still in flight rather than extracting it a
+        second time; its result lands in the stream cache or `player.prefetched`.
+        """
+        task = player.prefetch_task
+        if player.prefetch_url != url or task is None or task.done():
+            return
+        # asyncio.wait neither cancels the task on timeout nor raises if it fails.
+        await asyncio.wait({task}, timeout=timeout)
+
+    async def prefetch(self, player, url):
+        try:
+            data = await YTDLSource.resolve(url, guild_id=player.guild_id)
+            if PREFETCH_FFMPEG and player.prefetch_url == url:
+                source = YTDLSource.from_data(
+                    data, volume=player.volume, mode=player.audio_mode
+                )
+                player.prefetched = (url, source)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Failed to prefetch {url}: {e}")
+
+    def schedule_disk_cache(self, track):
+        """Save a streamed track to the disk cache in the background."""
+        if (
+            disk_cache is not None
+            and track.duration
+            and track.duration <= DISK_CACHE_MAX_DURATION
+            and disk_cache.should_populate(track.id)
+        ):
+            self.spawn(disk_cache.populate(track.id, track.url))
+
+    def spawn(self, coro):
+        """Run `coro` in the background, keeping a reference until it finishes."""
+        task = asyncio.create_task(coro)
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+        return task
 
     def get_user_locale(self, ctx):
-        # TODO: Implement user locale detection
-        return "ko"
+        """Locale to answer in for an interaction, command context or message."""
+        return locale_resolver.resolve(ctx)
 
     # Command handlers
     @app_commands.command(name="play", description="Play a song with given keyword")
@@ -39,6 +306,19 @@ class Music(commands.Cog):
     async def slash_search(self, interaction: discord.Interaction, keyword: str):
         await self.handle_search_command(interaction, keyword)
 
+    @slash_play.autocomplete("keyword")
+    @slash_search.autocomplete("keyword")
+    async def keyword_autocomplete(
+        self, interaction: discord.Interaction, current: str
+    ):
+        """Suggest known tracks from memory only; the value is the track's URL."""
+        return [
+            app_commands.Choice(
+                name=ellipsis(f"{track.title} - {track.channel}", 90), value=track.url
+            )
+            for track in self.suggestions.suggest(interaction.guild_id, current)
+        ]
+
     @app_commands.command(name="now", description="Show the currently playing song")
     async def slash_now(self, interaction: discord.Interaction):
         await self.show_now_playing(interaction)
@@ -47,95 +327,280 @@ class Music(commands.Cog):
     async def slash_clear(self, interaction: discord.Interaction):
         await self.clear(interaction)
 
-    async def play_url(self, ctx, current):
+    @app_commands.command(name="remove", description="Remove a song from the queue")
+    async def slash_remove(self, interaction: discord.Interaction, position: int):
+        await self.remove_track(interaction, position)
+
+    @app_commands.command(name="move", description="Move a song to another position")
+    async def slash_move(
+        self, interaction: discord.Interaction, position: int, destination: int
+    ):
+        await self.move_track(interaction, position, destination)
+
+    @app_commands.command(name="shuffle", description="Shuffle the music queue")
+    async def slash_shuffle(self, interaction: discord.Interaction):
+        await self.shuffle(interaction)
+
+    async def play_url(self, ctx, current, timeout=None, command_started=None):
+        """Start playing `current`; returns False if it could not be started."""
+        started = time.perf_counter()
+        playing = False
         try:
-            self.current = current
-            url = current["link"]
-            player = await self.create_player(url)
+            guild_player = self.get_player(ctx)
+            guild_player.current = current
+            guild_player.text_channel_id = ctx.channel.id
+            guild_player.touch()
+            await self.await_prefetch(guild_player, current.url, timeout)
+            player = guild_player.take_prefetched(current.url)
+            if isinstance(player, discord.PCMVolumeTransformer):
+                player.volume = guild_player.volume
+            elif player is None:
+                player = await self.create_player(
+                    current,
+                    volume=guild_player.volume,
+                    mode=guild_player.audio_mode,
+                    guild_id=ctx.guild.id,
+                    timeout=timeout,
+                )
+            # Keep the resolved stream so loop mode can replay without extracting.
+            current = guild_player.current = current.with_stream(player.data)
+            player.on_first_frame = lambda: self.bot.loop.call_soon_threadsafe(
+                self.record_first_audio, ctx.guild.id, started, command_started
+            )
             ctx.voice_client.play(player, after=lambda e: self.after_play(ctx, e))
-            await self.send_now_playing(ctx, current)
+            playing = True
+            self.schedule_prefetch(guild_player)
+            self.schedule_disk_cache(current)
+            self.suggestions.add_played(ctx.guild.id, current)
+            with metrics.timer("now_playing", ctx.guild.id):
+                await self.send_now_playing(ctx, current)
         except Exception as e:
             logger.error(f"Error playing URL: {e}")
             await ctx.send(f"Error playing URL: {e}")
+        return playing
 
-    async def send_now_playing(self, ctx, current):
+    async def send_now_playing(self, ctx, current, locale=None):
+        """Edit the guild's now-playing message in place, posting one if needed."""
         try:
-            locale = self.get_user_locale(ctx)
+            player = self.get_player(ctx)
+            player.np_update_ctx = None
+            locale = locale or self.get_user_locale(ctx)
             embed = self.create_now_playing_embed(ctx, current, locale)
             view = self.create_view()
 
-            now = await ctx.send(embed=embed, view=view)
-
-            if self.now_playing_message:
-                await self.delete_previous_now_playing_message()
-
-            self.now_playing_message = now
+            if player.now_playing_message:
+                try:
+                    await player.now_playing_message.edit(embed=embed, view=view)
+                    return
+                except discord.errors.NotFound:
+                    player.now_playing_message = None
+                except discord.errors.HTTPException as e:
+                    logger.warning(f"Failed to edit now playing message: {e}")
+                    await self.delete_previous_now_playing_message(player)
+
+            player.now_playing_message = await ctx.send(embed=embed, view=view)
         except Exception as e:
             logger.error(f"Error sending now playing message: {e}")
             await ctx.send(
                 "An error occurred while trying to display the now playing message."
             )
 
-    async def delete_previous_now_playing_message(self):
+    async def delete_previous_now_playing_message(self, player):
         try:
-            await self.now_playing_message.delete()
+            await player.now_playing_message.delete()
         except discord.errors.NotFound:
             logger.warning(
                 "Could not delete previous now playing message. It may have been already deleted."
             )
         except discord.errors.HTTPException as e:
             logger.error(f"Failed to delete previous message: {e}")
+        player.now_playing_message = None
+
+    def request_now_playing_update(self, ctx, locale=None):
+        """Coalesce bursts of state changes into one edit per debounce window."""
+        player = self.get_player(ctx)
+        player.np_update_ctx = ctx
+        player.np_update_locale = locale
+        if player.np_update_task is None or player.np_update_task.done():
+            player.np_update_task = asyncio.create_task(
+                self.flush_now_playing_update(player)
+            )
+
+    async def flush_now_playing_update(self, player):
+        await asyncio.sleep(NOW_PLAYING_DEBOUNCE)
+        ctx = player.np_update_ctx
+        if ctx is not None and player.current:
+            await self.send_now_playing(ctx, player.current, player.np_update_locale)
+
+    async def refresh_now_playing(self, interaction, ctx):
+        """Answer a button click by redrawing the now-playing message."""
+        player = self.get_player(ctx)
+        message = player.now_playing_message
+        # ctx comes from the message, so its author is the bot; use the clicker's.
+        locale = self.get_user_locale(interaction)
+        if (
+            player.current
+            and message is not None
+            and interaction.message is not None
+            and interaction.message.id == message.id
+        ):
+            player.np_update_ctx = None
+            embed = self.create_now_playing_embed(ctx, player.current, locale)
+            await interaction.response.edit_message(
+                embed=embed, view=self.create_view()
+            )
+        else:
+            await interaction.response.defer()
+            self.request_now_playing_update(ctx, locale)
 
     @commands.command(aliases=["p", "P", "ㅔ"])
     async def play(self, ctx, *, keyword=None):
         await self.play_command(ctx, keyword)
 
     async def play_command(self, ctx, keyword=None):
+        command_started = time.perf_counter()
         locale = self.get_user_locale(ctx)
         if not keyword:
             await ctx.send(get_translation("enter_keyword", locale))
             return
 
+        if is_playlist_url(keyword):
+            await self.enqueue_playlist(ctx, keyword.strip())
+            return
+
+        player = self.get_player(ctx)
         async with ctx.typing():
-            video_search = VideosSearch(keyword, limit=1)
-            result = video_search.result()["result"][0]
-            self.queue.append(result)
+            # A picked autocomplete suggestion is a URL of a track we already know.
+            track = self.suggestions.lookup(ctx.guild.id, keyword)
+            if track is None:
+                with metrics.timer("search", ctx.guild.id, keyword=keyword):
+                    results = await self.search.search(keyword, limit=1)
+                if not results:
+                    await ctx.send(get_translation("no_results", locale))
+                    return
+                track = Track.from_search(results[0])
+                self.suggestions.add_results(keyword, [track])
+
+            player.queue.append(track.with_requester(ctx.author.id))
 
             if not ctx.voice_client.is_playing() and not ctx.voice_client.is_paused():
-                await self.play_url(ctx, self.queue.pop(0))
+                await self.play_url(
+                    ctx,
+                    player.queue.popleft(),
+                    timeout=self.interaction_timeout(ctx),
+                    command_started=command_started,
+                )
             else:
+                self.schedule_prefetch(player)
                 await self.send_queue(ctx)
 
-    def after_play(self, ctx, error):
-        if error:
-            logger.error(f"Player error: {error}")
-        coro = self.play_next(ctx)
-        fut = asyncio.run_coroutine_threadsafe(coro, self.bot.loop)
+    async def enqueue_playlist(self, ctx, url):
+        """
+        Stream a playlist into the queue batch by batch. Only flat metadata is
+        fetched here; each track is resolved when it is about to play.
+        """
+        locale = self.get_user_locale(ctx)
+        player = self.get_player(ctx)
+        added = 0
         try:
-            fut.result()
+            async for entries in extractor.iter_playlist(
+                url, batch_size=PLAYLIST_BATCH_SIZE, limit=PLAYLIST_MAX_TRACKS
+            ):
+                if self.players.peek(ctx.guild.id) is not player:
+                    # The player was torn down (stop/reset) mid-import.
+                    return
+                tracks = [
+                    Track.from_entry(entry, ctx.author.id)
+                    for entry in entries
+                    if entry
+                    and entry.get("id")
+                    and entry.get("title") not in UNAVAILABLE_TITLES
+                ]
+                player.queue.extend(tracks)
+                added += len(tracks)
+
+                voice_client = ctx.voice_client
+                if (
+                    player.queue
+                    and not voice_client.is_playing()
+                    and not voice_client.is_paused()
+                ):
+                    await self.play_next(ctx, timeout=self.interaction_timeout(ctx))
+                else:
+                    self.schedule_prefetch(player)
         except Exception as e:
-            logger.error(f"Error resuming playback: {e}")
-
-    async def play_next(self, ctx):
-        if self.queue:
-            next_item = self.queue.pop(0)
-            await self.play_url(ctx, next_item)
-        elif self.loop and self.current:
-            await self.play_url(ctx, self.current)
+            logger.error(f"Failed to import playlist {url}: {e}")
+
+        if added:
+            await ctx.send(get_translation("playlist_added", locale, count=added))
         else:
-            self.current = None
-            locale = self.get_user_locale(ctx)
-            await ctx.send(get_translation("queue_empty", locale))
+            await ctx.send(get_translation("no_results", locale))
+
+    def after_play(self, ctx, error):
+        # Runs on discord.py's audio thread: signal the guild's player and return.
+        player = self.players.peek(ctx.guild.id)
+        if player is not None:
+            player.signal_track_end(self.bot.loop, ctx, error)
+
+    async def on_track_end(self, player, event):
+        if event.error:
+            logger.error(f"Player error in guild {player.guild_id}: {event.error}")
+
+        voice_client = event.ctx.voice_client
+        if voice_client is None or not voice_client.is_connected():
+            return
+
+        await self.play_next(event.ctx)
+        elapsed = time.perf_counter() - event.signalled_at
+        if elapsed > TRACK_END_SLOW_SECONDS:
+            logger.warning(
+                f"Advancing to the next track took {elapsed:.2f}s in guild {player.guild_id}"
+            )
+        else:
+            logger.debug(
+                f"Advanced to the next track in {elapsed:.3f}s in guild {player.guild_id}"
+            )
+
+    async def play_next(self, ctx, timeout=None):
+        player = self.get_player(ctx)
+        # Queued tracks are resolved only when they come up, so some (removed,
+        # region-locked) fail here; skip past them, but not forever.
+        for _ in range(UNPLAYABLE_SKIP_LIMIT):
+            if player.queue:
+                next_item = player.queue.popleft()
+                if await self.play_url(ctx, next_item, timeout=timeout):
+                    return
+                player.current = None
+            elif player.loop and player.current:
+                await self.play_url(ctx, player.current, timeout=timeout)
+                return
+            else:
+                break
+        else:
+            logger.warning(
+                f"Stopped after {UNPLAYABLE_SKIP_LIMIT} unplayable tracks in guild {ctx.guild.id}"
+            )
+            return
+
+        player.current = None
+        if player.now_playing_message:
+            await self.delete_previous_now_playing_message(player)
+        locale = self.get_user_locale(ctx)
+        await ctx.send(get_translation("queue_empty", locale))
 
     def create_now_playing_embed(self, ctx, current, locale):
-        url = current["link"]
-        title = ellipsis(current["title"])
-        thumbnail = current["thumbnails"][0]["url"]
-        channel = current["channel"]["name"]
-        duration = current["duration"]
+        url = current.url
+        title = ellipsis(current.title)
+        thumbnail = current.thumbnail
+        channel = current.channel
+        duration = current.display_duration
+        if current.requester_id:
+            requester = f"<@{current.requester_id}>"
+        else:
+            requester = ctx.author.mention
 
         play_status = "⏸️" if ctx.voice_client.is_paused() else "▶️"
-        loop_status = "Y" if self.loop else "N"
+        loop_status = "Y" if self.get_player(ctx).loop else "N"
 
         embed = discord.Embed(
             title=f"{play_status}  {get_translation('playing_now', locale)}  💿  | {channel}",
@@ -148,7 +613,7 @@ class Music(commands.Cog):
         )
         embed.add_field(
             name=get_translation("requester", locale),
-            value=ctx.author.mention,
+            value=requester,
             inline=True,
         )
         embed.add_field(
@@ -171,66 +636,150 @@ class Music(commands.Cog):
             )
         return view
 
-    async def send_queue(self, ctx):
-        locale = self.get_user_locale(ctx)
-        if not self.queue:
+    async def send_queue(self, ctx, locale=None):
+        player = self.get_player(ctx)
+        locale = locale or self.get_user_locale(ctx)
+        if not player.queue:
             embed = discord.Embed(
                 description=get_translation("queue_empty", locale),
                 color=discord.Color.green(),
             )
             await ctx.send(embed=embed)
         else:
-            now = ellipsis(self.current["title"])
-            queue_list = ""
-            view = View()
-
-            for idx, video in enumerate(self.queue):
-                title = ellipsis(video["title"], 45)
-                queue_list += f"{idx + 1}. {title}\n"
-
-                button = Button(
-                    label=f"{idx + 1}",
-                    style=discord.ButtonStyle.secondary,
-                    custom_id=f"play_{idx}",
-                )
-                button.callback = self.queue_button_callback
-                view.add_item(button)
+            view = QueueView(self, player, locale)
+            await ctx.send(embed=view.render(), view=view)
+
+    async def jump_to(self, interaction, index, track_id):
+        """Play the queued track at `index` next, skipping the current one."""
+        player = self.players.peek(interaction.guild_id)
+        if (
+            not player
+            or index >= len(player.queue)
+            or player.queue[index].id != track_id
+        ):
+            await interaction.response.send_message(
+                "Invalid song selection.", ephemeral=True
+            )
+            return
 
-            embed = discord.Embed(
-                title=get_translation("current_queue", locale),
-                description=f"**{get_translation('playing_now', locale)}:** {now}\n\n**{get_translation('up_next', locale)}:**\n{queue_list}",
-                color=discord.Color.green(),
+        voice_client = interaction.guild.voice_client
+        if voice_client is None:
+            await interaction.response.send_message(
+                get_translation(
+                    "join_voice_channel", self.get_user_locale(interaction)
+                ),
+                ephemeral=True,
             )
+            return
 
-            self.now_playing_message = await ctx.send(embed=embed, view=view)
+        await interaction.response.defer()
+        player.queue.move(index, 0)
+        self.schedule_prefetch(player)
+        if voice_client.is_playing() or voice_client.is_paused():
+            # The track-end event advances to the selected song.
+            voice_client.stop()
+        else:
+            await self.play_next(await self.bot.get_context(interaction))
 
-    async def queue_button_callback(self, interaction):
-        custom_id = interaction.data.get("custom_id", "")
-        if custom_id.startswith("play_"):
-            index = int(custom_id.split("_")[1])
-            if index < len(self.queue):
-                selected_song = self.queue.pop(index)
+    @commands.command()
+    async def volume(self, ctx, volume: int):
+        locale = self.get_user_locale(ctx)
+        player = self.get_player(ctx)
+        player.volume = volume / 100
+        source = ctx.voice_client.source
+        if isinstance(source, discord.PCMVolumeTransformer):
+            source.volume = volume / 100
+            await ctx.send(get_translation("volume_changed", locale, volume=volume))
+        else:
+            # FFmpeg applies the volume, so it only takes effect on the next track.
+            player.invalidate_prefetch()
+            await ctx.send(get_translation("volume_next_track", locale, volume=volume))
 
-                if interaction.guild.voice_client.is_playing():
-                    interaction.guild.voice_client.stop()
+    @commands.command()
+    async def audiomode(self, ctx, mode: str):
+        locale = self.get_user_locale(ctx)
+        mode = mode.lower()
+        if mode not in ("pcm", "opus"):
+            raise commands.BadArgument(get_translation("invalid_audio_mode", locale))
 
-                self.queue.insert(0, selected_song)
+        player = self.get_player(ctx)
+        player.audio_mode = mode
+        player.invalidate_prefetch()
+        await ctx.send(get_translation("audio_mode_changed", locale, mode=mode))
 
-                await self.play_next(await self.bot.get_context(interaction))
-            else:
-                await interaction.response.send_message(
-                    "Invalid song selection.", ephemeral=True
-                )
-        else:
+    @app_commands.command(name="stats", description="Show play pipeline latency")
+    async def slash_stats(self, interaction: discord.Interaction):
+        await self.show_stats(interaction)
+
+    async def show_stats(self, interaction: discord.Interaction):
+        if not await self.bot.is_owner(interaction.user):
             await interaction.response.send_message(
-                "Error processing button click.", ephemeral=True
+                "Only the bot owner can use this command.", ephemeral=True
             )
+            return
+
+        embed = discord.Embed(
+            title="Play pipeline latency", color=discord.Color.lighter_grey()
+        )
+        for scope, guild_id in (
+            ("Global", None),
+            ("This server", interaction.guild_id),
+        ):
+            rows = [
+                f"`{stage:<16}` n={count} p50={p50:.2f}s p90={p90:.2f}s p99={p99:.2f}s"
+                for stage, (count, p50, p90, p99) in metrics.summary(guild_id).items()
+            ]
+            embed.add_field(name=scope, value="\n".join(rows) or "-", inline=False)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
 
     @commands.command()
-    async def volume(self, ctx, volume: int):
-        locale = self.get_user_locale(ctx)
-        ctx.voice_client.source.volume = volume / 100
-        await ctx.send(get_translation("volume_changed", locale, volume=volume))
+    @commands.is_owner()
+    async def cachestats(self, ctx):
+        lines = []
+        for name, stats in self.cache_stats().items():
+            values = ", ".join(
+                f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+                for key, value in stats.items()
+            )
+            lines.append(f"**{name}**: {values}")
+        await ctx.send("\n".join(lines))
+
+    @commands.command()
+    @commands.is_owner()
+    async def sync(self, ctx):
+        synced = await self.bot.sync_commands(force=True)
+        await ctx.send(f"Synced {synced} commands")
+
+    @commands.command()
+    @commands.is_owner()
+    async def reload(self, ctx, *extensions):
+        """
+        Reload extensions in place (default: all of them). Players, queues and
+        voice connections carry over; changes under utils/ still need a restart.
+        """
+        names = [
+            name if "." in name else f"cogs.{name}"
+            for name in extensions or self.bot.extensions
+        ]
+        self.bot.reloading = True
+        try:
+            for name in names:
+                try:
+                    await self.bot.reload_extension(name)
+                except commands.ExtensionError as e:
+                    logger.error(f"Failed to reload {name}: {e}")
+                    await ctx.send(f"Failed to reload {name}: {e}")
+                    return
+        finally:
+            self.bot.reloading = False
+        logger.info(f"Reloaded {', '.join(names)}")
+
+        message = f"Reloaded {', '.join(names)}"
+        if self.bot.owns_global_state:
+            synced = await self.bot.sync_commands()
+            if synced is not None:
+                message += f"; synced {synced} commands"
+        await ctx.send(message)
 
     @play.before_invoke
     async def ensure_voice(self, ctx):
@@ -255,9 +804,110 @@ class Music(commands.Cog):
         else:
             await channel.connect()
 
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        guild = member.guild
+        if member.id == self.bot.user.id and after.channel is None:
+            await self.teardown_player(guild.id)
+            return
+
+        voice_client = guild.voice_client
+        player = self.players.peek(guild.id)
+        if voice_client is None or player is None:
+            return
+        if voice_client.channel in (before.channel, after.channel):
+            self.update_alone(player, voice_client.channel)
+
+    @staticmethod
+    def update_alone(player, channel):
+        if any(not member.bot for member in channel.members):
+            player.alone_since = None
+        elif player.alone_since is None:
+            player.alone_since = time.monotonic()
+
+    async def teardown_player(self, guild_id):
+        """Discard the guild's player and its now-playing message with dead buttons."""
+        player = self.players.peek(guild_id)
+        if player is not None and player.now_playing_message:
+            await self.delete_previous_now_playing_message(player)
+        self.players.discard(guild_id)
+
+    async def leave_voice(self, guild, reason):
+        player = self.players.peek(guild.id)
+        message = player.now_playing_message if player else None
+        logger.info(f"Leaving voice in guild {guild.id}: {reason}")
+        # Tear down first, so stopping playback doesn't advance the queue.
+        await self.teardown_player(guild.id)
+        if guild.voice_client is not None:
+            await guild.voice_client.disconnect()
+        if message is not None:
+            try:
+                await message.channel.send(
+                    get_translation("left_idle", self.get_user_locale(guild))
+                )
+            except discord.HTTPException as e:
+                logger.warning(f"Failed to announce leaving guild {guild.id}: {e}")
+
+    @tasks.loop(seconds=REAPER_INTERVAL)
+    async def reap_idle(self):
+        """Leave idle or empty voice channels and drop players left behind."""
+        now = time.monotonic()
+        for voice_client in list(self.bot.voice_clients):
+            guild = voice_client.guild
+            player = self.players.get(guild.id)
+            if voice_client.is_playing():
+                player.touch()
+            self.update_alone(player, voice_client.channel)
+
+            if (
+                player.alone_since is not None
+                and now - player.alone_since > ALONE_DISCONNECT_SECONDS
+            ):
+                reason = "alone in channel"
+            elif now - player.last_active > IDLE_DISCONNECT_SECONDS:
+                reason = "idle"
+            else:
+                continue
+            # One failing guild must not stop the loop; tasks.loop won't restart.
+            try:
+                await self.leave_voice(guild, reason)
+            except Exception as e:
+                logger.error(f"Failed to leave voice in guild {guild.id}: {e}")
+
+        for player in self.players:
+            guild = self.bot.get_guild(player.guild_id)
+            if (guild is None or guild.voice_client is None) and (
+                now - player.last_active > IDLE_DISCONNECT_SECONDS
+            ):
+                try:
+                    await self.teardown_player(player.guild_id)
+                except Exception as e:
+                    logger.error(f"Failed to tear down guild {player.guild_id}: {e}")
+
+        try:
+            await self.reap_orphaned_sources()
+        except Exception as e:
+            logger.error(f"Failed to reap orphaned FFmpeg sources: {e}")
+
+    async def reap_orphaned_sources(self):
+        """Clean up FFmpeg sources that nothing is playing or holding for later."""
+        in_use = {voice_client.source for voice_client in self.bot.voice_clients}
+        in_use.update(
+            player.prefetched[1] for player in self.players if player.prefetched
+        )
+        # The audio thread discards sources as they finish, so iterate a copy.
+        orphans = [source for source in list(live_sources) if source not in in_use]
+        if not orphans:
+            return
+        # cleanup() kills and waits on the process, so keep it off the loop.
+        await self.bot.loop.run_in_executor(
+            None, lambda: [source.cleanup() for source in orphans]
+        )
+        logger.info(f"Reaped {len(orphans)} orphaned FFmpeg processes")
+
     @commands.command()
     async def reset(self, ctx):
-        self.__init__(self.bot)
+        self.players.discard(ctx.guild.id)
         await ctx.send("Reset complete.")
         await ctx.voice_client.disconnect()
 
@@ -267,6 +917,7 @@ class Music(commands.Cog):
                 self.interaction = interaction
                 self.author = interaction.user
                 self.voice_client = interaction.guild.voice_client
+                self.channel = interaction.channel
                 self.send = interaction.followup.send
                 self.typing = interaction.channel.typing
                 self.message = interaction.message
@@ -296,32 +947,38 @@ class Music(commands.Cog):
             return
 
         async with interaction.channel.typing():
-            videosSearch = VideosSearch(keyword, limit=5)
-            results = videosSearch.result()["result"]
+            track = self.suggestions.lookup(interaction.guild_id, keyword)
+            if track is not None:
+                tracks = [track]
+            else:
+                with metrics.timer("search", interaction.guild_id, keyword=keyword):
+                    results = await self.search.search(keyword, limit=5)
+                tracks = [Track.from_search(result) for result in results]
+                self.suggestions.add_results(keyword, tracks)
 
-            if not results:
+            if not tracks:
                 await interaction.response.send_message(
                     get_translation("no_results", locale)
                 )
                 return
-
             await interaction.response.send_message(
                 get_translation("search_list", locale),
-                view=SearchView(results, self, interaction),
+                view=SearchView(tracks, self, interaction),
             )
 
-    async def play_selected(self, interaction, selected_result):
+    async def play_selected(self, interaction, selected_track):
         class Context:
-            def __init__(self, interaction, selected_result):
+            def __init__(self, interaction, selected_track):
                 self.interaction = interaction
                 self.author = interaction.user
                 self.voice_client = interaction.guild.voice_client
+                self.channel = interaction.channel
                 self.send = interaction.followup.send
                 self.typing = interaction.channel.typing
                 self.message = interaction.message
                 self.guild = interaction.guild
 
-        ctx = Context(interaction, selected_result)
+        ctx = Context(interaction, selected_track)
         locale = self.get_user_locale(ctx)
 
         if ctx.voice_client is None:
@@ -333,22 +990,27 @@ class Music(commands.Cog):
                 return
 
         ctx.voice_client = ctx.guild.voice_client
-        self.queue.append(selected_result)
+        player = self.get_player(ctx)
+        player.queue.append(selected_track.with_requester(ctx.author.id))
         if not ctx.voice_client.is_playing() and not ctx.voice_client.is_paused():
-            await self.play_url(ctx, self.queue.pop(0))
+            await self.play_url(
+                ctx, player.queue.popleft(), timeout=self.interaction_timeout(ctx)
+            )
         else:
+            self.schedule_prefetch(player)
             await self.send_queue(ctx)
 
     async def show_now_playing(self, interaction: discord.Interaction):
         ctx = await self.bot.get_context(interaction)
         locale = self.get_user_locale(ctx)
-        if self.current:
-            embed = self.create_now_playing_embed(ctx, self.current, locale)
+        player = self.players.peek(interaction.guild_id)
+        if player and player.current:
+            embed = self.create_now_playing_embed(ctx, player.current, locale)
             view = self.create_view()
             await interaction.response.send_message(embed=embed, view=view)
         else:
-            if self.queue:
-                next_song = self.queue[0]["title"]
+            if player and player.queue:
+                next_song = player.queue[0].title
                 message = f"No song is currently playing. Next up: {next_song}"
             else:
                 message = "No song is currently playing and the queue is empty."
@@ -356,13 +1018,73 @@ class Music(commands.Cog):
 
     async def clear(self, interaction: discord.Interaction):
         locale = self.get_user_locale(interaction)
-        if not self.queue:
+        player = self.players.peek(interaction.guild_id)
+        if not player or not player.queue:
             await interaction.response.send_message(
-                "대기열이 이미 비어있습니다.", ephemeral=True
+                get_translation("queue_already_empty", locale), ephemeral=True
             )
         else:
-            self.queue.clear()
-            await interaction.response.send_message("대기열이 초기화되었습니다.")
+            player.queue.clear()
+            player.invalidate_prefetch()
+            await interaction.response.send_message(
+                get_translation("queue_cleared", locale)
+            )
+
+    async def remove_track(self, interaction: discord.Interaction, position: int):
+        locale = self.get_user_locale(interaction)
+        player = self.players.peek(interaction.guild_id)
+        if not player or not 1 <= position <= len(player.queue):
+            await interaction.response.send_message(
+                get_translation("invalid_position", locale, position=position),
+                ephemeral=True,
+            )
+            return
+
+        track = player.queue.remove_at(position - 1)
+        self.schedule_prefetch(player)
+        await interaction.response.send_message(
+            get_translation("track_removed", locale, title=ellipsis(track.title))
+        )
+
+    async def move_track(
+        self, interaction: discord.Interaction, position: int, destination: int
+    ):
+        locale = self.get_user_locale(interaction)
+        player = self.players.peek(interaction.guild_id)
+        size = len(player.queue) if player else 0
+        for value in (position, destination):
+            if not 1 <= value <= size:
+                await interaction.response.send_message(
+                    get_translation("invalid_position", locale, position=value),
+                    ephemeral=True,
+                )
+                return
+
+        track = player.queue.move(position - 1, destination - 1)
+        self.schedule_prefetch(player)
+        await interaction.response.send_message(
+            get_translation(
+                "track_moved",
+                locale,
+                title=ellipsis(track.title),
+                position=destination,
+            )
+        )
+
+    async def shuffle(self, interaction: discord.Interaction):
+        locale = self.get_user_locale(interaction)
+        player = self.players.peek(interaction.guild_id)
+        if not player or not player.queue:
+            await interaction.response.send_message(
+                get_translation("queue_empty", locale), ephemeral=True
+            )
+            return
+
+        player.queue.shuffle()
+        self.schedule_prefetch(player)
+        await interaction.response.send_message(
+            get_translation("queue_shuffled", locale)
+        )
 
     # Error handling
     async def cog_command_error(self, ctx: commands.Context, error: Exception):
@@ -387,21 +1109,30 @@ async def setup(bot: commands.Bot):
         raise
 
 
+def view_custom_id(name):
+    """
+    Custom id for a component handled by its own View. Random like discord.py's
+    defaults, so views sent at the same time never share one.
+    """
+    return f"{VIEW_CUSTOM_ID_PREFIX}{name}:{os.urandom(8).hex()}"
+
+
 class SearchSelect(discord.ui.Select):
-    def __init__(self, results, cog, interaction):
-        self.results = results
+    def __init__(self, tracks, cog, interaction):
+        self.tracks = tracks
         self.cog = cog
         self.interaction = interaction
         options = [
             discord.SelectOption(
-                label=result["title"],
-                description=result["channel"]["name"],
+                label=ellipsis(track.title, 95),
+                description=ellipsis(track.channel, 95) or None,
                 value=str(index),
             )
-            for index, result in enumerate(results)
+            for index, track in enumerate(tracks)
         ]
         super().__init__(
             placeholder="Choose a song...",
+            custom_id=view_custom_id("search_select"),
             min_values=1,
             max_values=1,
             options=options,
@@ -409,16 +1140,111 @@ class SearchSelect(discord.ui.Select):
 
     async def callback(self, interaction: discord.Interaction):
         selected_index = int(self.values[0])
-        selected_result = self.results[selected_index]
+        selected_track = self.tracks[selected_index]
         try:
             if not interaction.response.is_done():
                 await interaction.response.defer()
         except discord.errors.InteractionResponded:
             pass
-        await self.cog.play_selected(interaction, selected_result)
+        await self.cog.play_selected(interaction, selected_track)
 
 
 class SearchView(discord.ui.View):
-    def __init__(self, results, cog, interaction):
+    def __init__(self, tracks, cog, interaction):
+        super().__init__()
+        self.add_item(SearchSelect(tracks, cog, interaction))
+
+
+class QueueView(View):
+    """Queue listing that only renders the visible page."""
+
+    PAGE_SIZE = 10
+
+    def __init__(self, cog, player, locale, page=0):
         super().__init__()
-        self.add_item(SearchSelect(results, cog, interaction))
+        self.cog = cog
+        self.player = player
+        self.locale = locale
+        self.page = page
+
+        style = discord.ButtonStyle.secondary
+        self.previous_button = Button(
+            label="◀", style=style, custom_id=view_custom_id("queue_prev")
+        )
+        self.previous_button.callback = self.previous_page
+        self.page_button = Button(
+            style=style, disabled=True, custom_id=view_custom_id("queue_page")
+        )
+        self.next_button = Button(
+            label="▶", style=style, custom_id=view_custom_id("queue_next")
+        )
+        self.next_button.callback = self.next_page
+        self.add_item(self.previous_button)
+        self.add_item(self.page_button)
+        self.add_item(self.next_button)
+        self.jump_select = None
+
+    @property
+    def page_count(self):
+        return max(1, -(-len(self.player.queue) // self.PAGE_SIZE))
+
+    def render(self):
+        """Build the embed for the current page and refresh the controls."""
+        queue = self.player.queue
+        self.page = min(self.page, self.page_count - 1)
+        start = self.page * self.PAGE_SIZE
+        stop = min(start + self.PAGE_SIZE, len(queue))
+        entries = [(index, queue[index]) for index in range(start, stop)]
+
+        self.previous_button.disabled = self.page == 0
+        self.next_button.disabled = self.page >= self.page_count - 1
+        self.page_button.label = f"{self.page + 1}/{self.page_count}"
+
+        if self.jump_select is not None:
+            self.remove_item(self.jump_select)
+            self.jump_select = None
+        if entries:
+            self.jump_select = QueueJumpSelect(self.cog, entries)
+            self.add_item(self.jump_select)
+
+        current = self.player.current
+        now = current.short_title if current else "-"
+        queue_list = "\n".join(
+            f"{index + 1}. {track.short_title}" for index, track in entries
+        )
+        return discord.Embed(
+            title=get_translation("current_queue", self.locale),
+            description=f"**{get_translation('playing_now', self.locale)}:** {now}\n\n**{get_translation('up_next', self.locale)}:**\n{queue_list}",
+            color=discord.Color.green(),
+        )
+
+    async def previous_page(self, interaction: discord.Interaction):
+        self.page = max(0, self.page - 1)
+        await interaction.response.edit_message(embed=self.render(), view=self)
+
+    async def next_page(self, interaction: discord.Interaction):
+        self.page += 1
+        await interaction.response.edit_message(embed=self.render(), view=self)
+
+
+class QueueJumpSelect(discord.ui.Select):
+    def __init__(self, cog, entries):
+        self.cog = cog
+        options = [
+            discord.SelectOption(
+                label=f"{index + 1}. {track.short_title}",
+                value=f"{index}:{track.id}",
+            )
+            for index, track in entries
+        ]
+        super().__init__(
+            placeholder="Jump to a song...",
+            custom_id=view_custom_id("queue_jump"),
+            min_values=1,
+            max_values=1,
+            options=options,
+        )
+
+    async def callback(self, interaction: discord.Interaction):
+        index, track_id = self.values[0].split(":", 1)
+        await self.cog.jump_to(interaction, int(index), track_id)
@@ -1,97 +1,156 @@
-import requests
+"""
+Register the bot's slash commands with Discord.
+
+The payload is built from the app commands defined on the Music cog, so it
+can't drift from what the bot actually handles. Everything is sent in one
+bulk-overwrite PUT, which also removes commands that no longer exist.
 
-from dataclasses import dataclass
+    python -m command.register_command               # global
+    python -m command.register_command --guild       # GUILD_ID from config
+    python -m command.register_command --guild 1234  # a specific guild
+    python -m command.register_command --dry-run     # show the diff only
+    python -m command.register_command --clear       # remove every command
+"""
 
-from time import sleep
+import sys
+import time
+import argparse
 
-from config import TOKEN, APPLICATION_ID
+import requests
 
+sys.path.append(".")
 
-@dataclass
-class APPLICATION_COMMAND_OPTION_TYPE:
-    SUB_COMMAND = 1
-    SUB_COMMAND_GROUP = 2
-    STRING = 3
-    INTEGER = 4
-    BOOLEAN = 5
-    USER = 6
-    CHANNEL = 7
-    ROLE = 8
-    MENTIONABLE = 9
-    NUMBER = 10
-    ATTACHMENT = 11
+import discord
+from discord import app_commands
 
+from config import TOKEN, APPLICATION_ID, GUILD_ID
+from utils.commands import command_payload
 
 HEADERS = {"Authorization": f"Bot {TOKEN}"}
 
-# https://discord.com/developers/docs/interactions/slash-commands#registering-a-command
-URL = f"https://discord.com/api/v8/applications/{APPLICATION_ID}/commands"
+# https://discord.com/developers/docs/interactions/application-commands#bulk-overwrite-global-application-commands
+API = f"https://discord.com/api/v10/applications/{APPLICATION_ID}"
+
+MAX_ATTEMPTS = 5
+
+
+def commands_url(guild_id=None):
+    if guild_id is None:
+        return f"{API}/commands"
+    return f"{API}/guilds/{guild_id}/commands"
+
 
+def build_commands():
+    """Serialize the Music cog's app commands without logging in."""
+    from cogs.music import Music
 
-def publish_command(url, commands):
-    r = requests.post(url, headers=HEADERS, json=commands)
-    if r.status_code != 200:
-        # 재시도
-        sleep(20)
-        print(f"Post to {url} failed; retrying once")
-        r = requests.post(url, headers=HEADERS, json=commands)
+    client = discord.Client(intents=discord.Intents.none())
+    tree = app_commands.CommandTree(client)
+    for command in Music.__cog_app_commands__:
+        tree.add_command(command)
+    return command_payload(tree)
 
-    # 디버그용
-    print(f"Response from {url}: {r.text}")
+
+def send(method, url, **kwargs):
+    """
+    Send a request, waiting out 429s for as long as Discord asks and
+    pausing when the bucket reports no requests remaining.
+    """
+    for _ in range(MAX_ATTEMPTS):
+        r = requests.request(method, url, headers=HEADERS, timeout=30, **kwargs)
+        if r.status_code == 429:
+            retry_after = float(
+                r.json().get("retry_after") or r.headers.get("Retry-After", 1)
+            )
+            print(f"Rate limited on {method} {url}; retrying in {retry_after:.2f}s")
+            time.sleep(retry_after)
+            continue
+
+        if r.headers.get("X-RateLimit-Remaining") == "0":
+            time.sleep(float(r.headers.get("X-RateLimit-Reset-After", 0)))
+        r.raise_for_status()
+        return r
+    raise RuntimeError(f"{method} {url} still rate limited after {MAX_ATTEMPTS} tries")
 
 
 def get_all_commands(url):
-    r = requests.get(url, headers=HEADERS)
-    if r.status_code == 200:
-        return r.json()
-    else:
-        print(f"Failed to fetch commands with status code {r.status_code}")
-        return []
-
-
-def delete_command(command_id):
-    url = f"https://discord.com/api/v8/applications/{APPLICATION_ID}/commands/{command_id}"
-    r = requests.delete(url, headers=HEADERS)
-    if r.status_code == 204:
-        print(f"Command {command_id} deleted successfully")
-    else:
-        print(f"Failed to delete command {command_id}: {r.text}")
-
-
-def run_delete():
-    existing_commands = get_all_commands(URL)
-    for command in existing_commands:
-        if command["name"] != "play":  # 특정 커맨드를 제외하고 삭제
-            delete_command(command["id"])
-
-
-def run():
-    commands = [
-        {
-            "name": "play",
-            "description": "Play a song with a given keyword",
-            "options": [
-                {
-                    "name": "keyword",
-                    "description": "keyword to search for music",
-                    "type": APPLICATION_COMMAND_OPTION_TYPE.STRING,
-                    "required": True,
-                }
-            ],
-        },
-        {
-            "name": "test",
-            "description": "Test command",
+    return send("GET", url).json()
 
-        }
-    ]
-    for command in commands:
-        publish_command(URL, command)
-        print()
 
-    print(f"{len(commands)} published")
+def bulk_overwrite(url, commands):
+    return send("PUT", url, json=commands).json()
+
+
+def _prune(value):
+    """Drop empty/default fields, which Discord omits from its responses."""
+    if isinstance(value, dict):
+        return {
+            key: _prune(item)
+            for key, item in value.items()
+            if item not in (None, False, [], {})
+        }
+    if isinstance(value, list):
+        return [_prune(item) for item in value]
+    return value
+
+
+def diff(local, remote):
+    """Return (added, removed, changed) command names between two payloads."""
+    remote_by_key = {(c.get("type", 1), c["name"]): c for c in remote}
+    local_by_key = {(c.get("type", 1), c["name"]): c for c in local}
+
+    added = [key[1] for key in local_by_key if key not in remote_by_key]
+    removed = [key[1] for key in remote_by_key if key not in local_by_key]
+    changed = []
+    for key, command in local_by_key.items():
+        existing = remote_by_key.get(key)
+        if existing is None:
+            continue
+        wanted = _prune(command)
+        current = _prune({field: existing.get(field) for field in command})
+        if wanted != current:
+            changed.append(command["name"])
+    return added, removed, changed
+
+
+def run(guild_id=None, dry_run=False, clear=False):
+    url = commands_url(guild_id)
+    local = [] if clear else build_commands()
+    added, removed, changed = diff(local, get_all_commands(url))
+
+    scope = f"guild {guild_id}" if guild_id else "global"
+    print(f"{scope}: {len(local)} commands")
+    for label, names in (("+", added), ("-", removed), ("~", changed)):
+        for name in names:
+            print(f"  {label} {name}")
+
+    if not (added or removed or changed):
+        print("Up to date; nothing to do")
+        return
+    if dry_run:
+        return
+
+    registered = bulk_overwrite(url, local)
+    print(f"{len(registered)} commands registered")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Register slash commands")
+    parser.add_argument(
+        "--guild",
+        nargs="?",
+        const=GUILD_ID,
+        help="register to a guild (default: GUILD_ID) instead of globally",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="print the diff without registering"
+    )
+    parser.add_argument(
+        "--clear", action="store_true", help="remove every command in the scope"
+    )
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    run()
-    # run_delete()
+    args = parse_args()
+    run(args.guild, dry_run=args.dry_run, clear=args.clear)
@@ -1,4 +1,94 @@
 TOKEN="<YOUR_BOT_TOKEN>"
 APPLICATION_ID="<YOUR_APPLICATION_ID>"
 GUILD_ID="<YOUR_GUILD_ID>"
-COMMAND_PREFIX="<YOUR_COMMAND_PREFIX>"
\ No newline at end of file
+COMMAND_PREFIX="<YOUR_COMMAND_PREFIX>"
+
+# Search cache
+SEARCH_CACHE_TTL = 600
+SEARCH_CACHE_SIZE = 512
+
+# Resolved stream cache
+STREAM_CACHE_SIZE = 256
+STREAM_CACHE_MAX_BYTES = 4 * 1024 * 1024
+
+# Spawn FFmpeg for the next queued track ahead of time
+PREFETCH_FFMPEG = False
+
+# Default playback mode for new guilds: "pcm" or "opus"
+AUDIO_MODE = "pcm"
+
+# yt-dlp extraction backend: "thread" or "process"
+EXTRACTOR_BACKEND = "thread"
+EXTRACTOR_WORKERS = 2
+EXTRACTOR_MAX_CONCURRENCY = 4
+EXTRACTOR_GUILD_CONCURRENCY = 2
+EXTRACTOR_TIMEOUT = 30
+
+# Log a warning when advancing to the next track takes longer than this
+TRACK_END_SLOW_SECONDS = 2.0
+
+# Seconds to coalesce now-playing message updates over
+NOW_PLAYING_DEBOUNCE = 1.0
+
+# Playlist import
+PLAYLIST_MAX_TRACKS = 500
+PLAYLIST_BATCH_SIZE = 50
+# Unplayable tracks skipped in a row before the player stops advancing
+UNPLAYABLE_SKIP_LIMIT = 5
+
+# On-disk audio cache for frequently played tracks
+DISK_CACHE_ENABLED = False
+DISK_CACHE_DIR = "audio_cache"
+DISK_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+DISK_CACHE_MAX_DURATION = 15 * 60
+
+# Play pipeline metrics
+METRICS_FILE = "metrics.prom"
+METRICS_DUMP_INTERVAL = 30
+METRICS_SLOW_SECONDS = {
+    "search": 1.5,
+    "extract": 3.0,
+    "ffmpeg_spawn": 0.5,
+    "first_audio": 5.0,
+    "now_playing": 1.0,
+}
+
+# Logging
+LOG_FILE = "playground_bot.log"
+LOG_JSON = True
+LOG_DEBUG_SAMPLE_RATE = 0.25
+
+# Sharding. SHARD_COUNT None asks Discord for its recommended count.
+SHARD_COUNT = None
+SHARDS_PER_PROCESS = 1
+SHARD_HEALTH_INTERVAL = 60
+# Launcher: seconds between process starts (identify rate limit),
+# restart backoff bounds, and uptime after which backoff resets.
+SHARD_START_DELAY = 5
+SHARD_RESTART_DELAY = 5
+SHARD_RESTART_MAX_DELAY = 300
+SHARD_STABLE_SECONDS = 600
+
+# Fingerprint of the last synced command tree; sync is skipped when unchanged
+COMMAND_SYNC_STATE_FILE = ".command_sync.json"
+
+# Queue persistence: state is snapshotted to SQLite at most once per interval
+# and playback resumes after a restart, one guild every QUEUE_RESTORE_DELAY s.
+QUEUE_DB_FILE = "queues.sqlite3"
+QUEUE_PERSIST_INTERVAL = 5
+QUEUE_RESTORE_DELAY = 1.0
+
+# Idle voice sessions: leave after this long with nothing playing, or this
+# long alone in the channel. The reaper also kills orphaned FFmpeg processes.
+IDLE_DISCONNECT_SECONDS = 600
+ALONE_DISCONNECT_SECONDS = 60
+REAPER_INTERVAL = 30
+
+# Autocomplete: tracks remembered per guild's play history and from search results
+SUGGEST_HISTORY_SIZE = 200
+SUGGEST_RESULTS_SIZE = 2000
+
+# Locale used when neither the user nor the guild has a supported one, and how
+# many users' last interaction locale is remembered for prefix commands
+LOCALE_DEFAULT = "ko"
+LOCALE_USER_CACHE_SIZE = 10000
@@ -0,0 +1,140 @@
+"""
+Run the bot as several processes, each owning a range of shards, and
+restart any process that exits without taking the others down.
+
+    python launcher.py [--shard-count N] [--per-process M]
+"""
+
+import sys
+import json
+import time
+import signal
+import logging
+import argparse
+import subprocess
+import urllib.request
+
+from config import (
+    TOKEN,
+    SHARD_COUNT,
+    SHARDS_PER_PROCESS,
+    SHARD_START_DELAY,
+    SHARD_RESTART_DELAY,
+    SHARD_RESTART_MAX_DELAY,
+    SHARD_STABLE_SECONDS,
+)
+from utils.shards import shard_ranges, shard_label
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - [launcher] - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger("PlaygroundLauncher")
+
+
+def recommended_shard_count(token):
+    """Ask Discord how many shards it wants this bot to run."""
+    request = urllib.request.Request(
+        "https://discord.com/api/v10/gateway/bot",
+        headers={"Authorization": f"Bot {token}"},
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.load(response)["shards"]
+
+
+class ShardProcess:
+    def __init__(self, shard_ids, shard_count):
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.label = shard_label(shard_ids)
+        self.process = None
+        self.started_at = 0.0
+        self.restart_at = 0.0
+        self.delay = SHARD_RESTART_DELAY
+
+    def start(self):
+        command = [sys.executable, "main.py", "--shard-count", str(self.shard_count)]
+        command += ["--shard-ids", *map(str, self.shard_ids)]
+        self.process = subprocess.Popen(command)
+        self.started_at = time.monotonic()
+        logger.info(f"Started {self.label} (pid {self.process.pid})")
+
+    def poll(self, now):
+        """Schedule a restart if the process died; return True if it is due."""
+        if self.process is not None:
+            code = self.process.poll()
+            if code is None:
+                return False
+            if now - self.started_at >= SHARD_STABLE_SECONDS:
+                self.delay = SHARD_RESTART_DELAY
+            logger.warning(
+                f"{self.label} exited with code {code}, restarting in {self.delay}s"
+            )
+            self.process = None
+            self.restart_at = now + self.delay
+            self.delay = min(self.delay * 2, SHARD_RESTART_MAX_DELAY)
+        return now >= self.restart_at
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+
+    def wait(self, timeout):
+        if self.process is None:
+            return
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            logger.warning(f"{self.label} did not stop in time, killing it")
+            self.process.kill()
+
+
+def run(shard_count, per_process):
+    shards = [
+        ShardProcess(shard_ids, shard_count)
+        for shard_ids in shard_ranges(shard_count, per_process)
+    ]
+    logger.info(f"Running {shard_count} shards in {len(shards)} processes")
+
+    stopping = False
+
+    def request_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    # Discord only accepts one identify every few seconds, so stagger starts.
+    for index, shard in enumerate(shards):
+        if stopping:
+            break
+        if index:
+            time.sleep(SHARD_START_DELAY)
+        shard.start()
+
+    while not stopping:
+        time.sleep(1)
+        now = time.monotonic()
+        for shard in shards:
+            if not stopping and shard.poll(now):
+                shard.start()
+
+    logger.info("Stopping all shards")
+    for shard in shards:
+        shard.stop()
+    for shard in shards:
+        shard.wait(timeout=30)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Playground: Bot shard launcher")
+    parser.add_argument("--shard-count", type=int, default=SHARD_COUNT)
+    parser.add_argument("--per-process", type=int, default=SHARDS_PER_PROCESS)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    shard_count = args.shard_count or recommended_shard_count(TOKEN)
+    run(shard_count, max(1, args.per_process))
@@ -1,71 +1,221 @@
+import time
+
+# Taken before anything else is imported, so the import phase is measured too.
+STARTED = time.perf_counter()
+
 import sys
 import asyncio
 import logging
-from logging.handlers import RotatingFileHandler
+import argparse
 
 import discord
-from discord.ext import commands
-
-from config import TOKEN, APPLICATION_ID, COMMAND_PREFIX
+from discord import app_commands
+from discord.ext import commands, tasks
+
+from config import (
+    TOKEN,
+    APPLICATION_ID,
+    COMMAND_PREFIX,
+    LOG_FILE,
+    LOG_JSON,
+    LOG_DEBUG_SAMPLE_RATE,
+    SHARD_HEALTH_INTERVAL,
+    COMMAND_SYNC_STATE_FILE,
+)
+from utils.commands import SyncState, command_payload, fingerprint
+from utils.logs import setup_logging, bind_log_context
+from utils.shards import shard_label, instance_path
+from utils.ytdl import warm_imports
 
 sys.path.append(".")
 
 intents = discord.Intents.default()
 intents.message_content = True
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("PlaygroundBot")
 logger.setLevel(logging.DEBUG)
 
+EXTENSIONS = ("cogs.music", "cogs.interactions")
 
-file_handler = RotatingFileHandler(
-    "playground_bot.log", maxBytes=5 * 1024 * 1024, backupCount=5
-)
-file_handler.setLevel(logging.DEBUG)
-
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
-
-formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-file_handler.setFormatter(formatter)
-console_handler.setFormatter(formatter)
 
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
+class PlaygroundTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction: discord.Interaction):
+        # Runs in the same task as the command, so the context sticks to its logs.
+        bind_log_context(guild_id=interaction.guild_id, interaction_id=interaction.id)
+        return True
 
 
-class PlaygroundBot(commands.Bot):
-    def __init__(self):
+class PlaygroundBot(commands.AutoShardedBot):
+    def __init__(self, shard_ids=None, shard_count=None, force_sync=False):
         super().__init__(
             command_prefix=commands.when_mentioned_or(COMMAND_PREFIX),
             description="Playground: Bot",
             intents=intents,
             application_id=APPLICATION_ID,
+            tree_cls=PlaygroundTree,
+            shard_ids=shard_ids,
+            shard_count=shard_count,
         )
+        # Label for this process's shard range; None when it runs every shard.
+        self.instance = shard_label(shard_ids)
+        self.force_sync = force_sync
+        self.sync_state = SyncState(COMMAND_SYNC_STATE_FILE)
+        # Seconds spent in each startup phase, logged once the bot is ready.
+        self.startup_phases = {"imports": time.perf_counter() - STARTED}
+        # Fire-and-forget tasks, held until done so they can't be garbage collected.
+        self.background_tasks = set()
+        self._phase_started = time.perf_counter()
+        self.before_invoke(self.bind_command_context)
+
+    @property
+    def owns_global_state(self):
+        """Only one process (the one with shard 0) syncs the command tree."""
+        return self.shard_ids is None or 0 in self.shard_ids
+
+    async def bind_command_context(self, ctx):
+        bind_log_context(guild_id=ctx.guild.id if ctx.guild else None)
+
+    def end_phase(self, name):
+        now = time.perf_counter()
+        self.startup_phases[name] = now - self._phase_started
+        self._phase_started = now
+
+    async def load_timed_extension(self, name):
+        started = time.perf_counter()
+        await self.load_extension(name)
+        self.startup_phases[name] = time.perf_counter() - started
 
     async def setup_hook(self):
+        self.end_phase("login")
         try:
-            await self.load_extension("cogs.music")
-            await self.load_extension("cogs.interactions")
+            # Importing a cog blocks the loop, so load them in order; each
+            # one's time is then its own.
+            for name in EXTENSIONS:
+                await self.load_timed_extension(name)
             logger.info("Cogs loaded successfully")
         except Exception as e:
             logger.error(f"Failed to load cogs: {e}")
             raise
+        self.end_phase("extensions")
+        self.log_shard_health.start()
+
+    async def close(self):
+        self.log_shard_health.cancel()
+        await super().close()
 
     async def on_ready(self):
         logger.info(f"Logged in as {self.user} (ID: {self.user.id})")
+        logger.info(f"Shards {sorted(self.shards)} of {self.shard_count}")
         logger.info("--------------------------------")
+        if "connect" not in self.startup_phases:
+            self.end_phase("connect")
+            self.log_startup_phases()
+            task = self.loop.create_task(self.warm_imports())
+            self.background_tasks.add(task)
+            task.add_done_callback(self.background_tasks.discard)
+        if not self.owns_global_state:
+            return
         try:
-            await self.tree.sync()
-            logger.info("Commands synced successfully!")
+            await self.sync_commands(force=self.force_sync)
+            self.force_sync = False
         except Exception as e:
             logger.error(f"Failed to sync commands: {e}")
 
+    def log_startup_phases(self):
+        phases = self.startup_phases
+        total = time.perf_counter() - STARTED
+        breakdown = ", ".join(
+            f"{name}={seconds:.2f}s" for name, seconds in phases.items()
+        )
+        logger.info(f"Startup took {total:.2f}s: {breakdown}")
 
-bot = PlaygroundBot()
-
-
-async def main():
+    async def warm_imports(self):
+        """Import yt-dlp and the search client now, not on the first /play."""
+        started = time.perf_counter()
+        try:
+            await self.loop.run_in_executor(None, warm_imports)
+        except Exception as e:
+            logger.warning(f"Failed to warm imports: {e}")
+            return
+        logger.info(f"Warmed imports in {time.perf_counter() - started:.2f}s")
+
+    async def sync_commands(self, force=False):
+        """
+        Sync the command tree only if it changed since the last sync.
+        on_ready fires on every reconnect, and each sync is a rate-limited
+        global request. Returns the number of commands synced, or None.
+        """
+        payload = command_payload(self.tree)
+        digest = fingerprint(payload)
+        scope = str(self.application_id)
+        if not force and self.sync_state.get(scope) == digest:
+            logger.info("Command tree unchanged, skipping sync")
+            return None
+
+        synced = await self.tree.sync()
+        self.sync_state.set(scope, digest)
+        logger.info(f"Synced {len(synced)} commands successfully!")
+        return len(synced)
+
+    async def on_shard_ready(self, shard_id):
+        logger.info(f"Shard {shard_id} ready")
+
+    async def on_shard_disconnect(self, shard_id):
+        logger.warning(f"Shard {shard_id} disconnected")
+
+    async def on_shard_resumed(self, shard_id):
+        logger.info(f"Shard {shard_id} resumed")
+
+    @tasks.loop(seconds=SHARD_HEALTH_INTERVAL)
+    async def log_shard_health(self):
+        guilds = {shard_id: 0 for shard_id in self.shards}
+        for guild in self.guilds:
+            guilds[guild.shard_id] = guilds.get(guild.shard_id, 0) + 1
+
+        players = {shard_id: 0 for shard_id in self.shards}
+        music = self.get_cog("Music")
+        for player in music.players if music else ():
+            guild = self.get_guild(player.guild_id)
+            if guild is not None:
+                players[guild.shard_id] = players.get(guild.shard_id, 0) + 1
+
+        for shard_id, shard in sorted(self.shards.items()):
+            state = "closed" if shard.is_closed() else "open"
+            logger.info(
+                f"Shard {shard_id}: {state}, latency {shard.latency * 1000:.0f}ms, "
+                f"{guilds[shard_id]} guilds, {players[shard_id]} players"
+            )
+
+    @log_shard_health.before_loop
+    async def before_log_shard_health(self):
+        await self.wait_until_ready()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Playground: Bot")
+    parser.add_argument(
+        "--shard-ids",
+        type=int,
+        nargs="+",
+        help="shard ids this process runs (default: all of them)",
+    )
+    parser.add_argument(
+        "--shard-count",
+        type=int,
+        help="total shards across all processes (default: Discord's recommendation)",
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="sync the command tree on startup even if it looks unchanged",
+    )
+    args = parser.parse_args(argv)
+    if args.shard_ids and args.shard_count is None:
+        parser.error("--shard-ids requires --shard-count")
+    return args
+
+
+async def main(bot):
     try:
         async with bot:
             await bot.start(TOKEN)
@@ -75,9 +225,23 @@ async def main():
 
 
 if __name__ == "__main__":
+    args = parse_args()
+    label = shard_label(args.shard_ids)
+    log_listener = setup_logging(
+        instance_path(LOG_FILE, label),
+        debug_sample_rate=LOG_DEBUG_SAMPLE_RATE,
+        json_format=LOG_JSON,
+        instance=label,
+    )
+    exit_code = 0
     try:
-        asyncio.run(main())
+        asyncio.run(main(PlaygroundBot(args.shard_ids, args.shard_count, args.sync)))
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
     except Exception as e:
         logger.critical(f"Unexpected error occurred: {e}")
+        # Non-zero so the launcher knows to restart this shard range.
+        exit_code = 1
+    finally:
+        log_listener.stop()
+    sys.exit(exit_code)
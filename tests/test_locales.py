@@ -0,0 +1,46 @@
+import os
+import sys
+import types
+
+import discord
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.i18n import LocaleCatalog, LocaleResolver
+
+LOCALE_DIR = os.path.join(ROOT, "locales")
+
+
+def test_every_key_exists_in_every_locale():
+    assert LocaleCatalog(LOCALE_DIR).validate() == []
+
+
+def test_missing_key_falls_back_to_english_then_the_key(tmp_path):
+    (tmp_path / "en.json").write_text('{"hello": "Hello {name}", "bye": "Bye"}')
+    (tmp_path / "ko.json").write_text('{"hello": "안녕 {name}"}', encoding="utf-8")
+    catalog = LocaleCatalog(str(tmp_path), locales=("en", "ko"))
+
+    assert catalog.translate("hello", "ko", name="A") == "안녕 A"
+    assert catalog.translate("bye", "ko") == "Bye"
+    assert catalog.translate("unknown", "ko") == "unknown"
+    assert catalog.validate() == ["ko: missing key 'bye'"]
+
+
+def test_resolver_prefers_interaction_then_user_then_guild():
+    resolver = LocaleResolver(default="ko")
+    user = types.SimpleNamespace(id=1)
+    guild = types.SimpleNamespace(preferred_locale=discord.Locale.taiwan_chinese)
+    interaction = types.SimpleNamespace(
+        locale=discord.Locale.american_english, guild_locale=None
+    )
+
+    ctx = types.SimpleNamespace(interaction=interaction, author=user, guild=guild)
+    assert resolver.resolve(ctx) == "en"
+    # A prefix command from the same user reuses their interaction locale.
+    ctx = types.SimpleNamespace(interaction=None, author=user, guild=guild)
+    assert resolver.resolve(ctx) == "en"
+    ctx.author = types.SimpleNamespace(id=2)
+    assert resolver.resolve(ctx) == "zh"
+    ctx.guild = None
+    assert resolver.resolve(ctx) == "ko"
@@ -0,0 +1,40 @@
+import os
+import sys
+from unittest import mock
+
+import discord
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.ytdl import YTDLOpusSource
+
+
+def ffmpeg_args(monkeypatch, volume):
+    """Build a source without spawning FFmpeg and return the argv it would use."""
+    spawned = []
+
+    def spawn(self, args, **kwargs):
+        spawned.append(args)
+        return mock.Mock(stdout=None, pid=0, **{"poll.return_value": 0})
+
+    monkeypatch.setattr(discord.FFmpegAudio, "_spawn_process", spawn)
+    source = YTDLOpusSource("https://example.invalid/a", data={}, volume=volume)
+    source.cleanup()
+    return spawned[0]
+
+
+def codec(args):
+    return args[args.index("-c:a") + 1]
+
+
+def test_full_volume_copies_the_stream(monkeypatch):
+    args = ffmpeg_args(monkeypatch, 1.0)
+    assert codec(args) == "copy"
+    assert "-filter:a" not in args
+
+
+def test_other_volumes_reencode_with_the_filter(monkeypatch):
+    args = ffmpeg_args(monkeypatch, 0.2)
+    assert codec(args) == "libopus"
+    assert args[args.index("-filter:a") + 1] == "volume=0.2"
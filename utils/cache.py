@@ -0,0 +1,145 @@
+import re
+import json
+import time
+import logging
+from collections import OrderedDict
+from urllib.parse import urlparse, parse_qs
+
+logger = logging.getLogger(__name__)
+
+# Keys of a yt-dlp info dict that playback actually needs.
+STREAM_KEYS = (
+    "id",
+    "title",
+    "url",
+    "ext",
+    "acodec",
+    "abr",
+    "asr",
+    "duration",
+    "filesize",
+    "http_headers",
+)
+
+_EXPIRE_PATH = re.compile(r"/expire/(\d+)")
+
+
+def extract_video_id(url):
+    """Return the YouTube video id for `url`, or None if it has none."""
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    if host.endswith("youtu.be"):
+        return parsed.path.lstrip("/").split("/")[0] or None
+    if "youtube" in host:
+        if parsed.path.startswith(("/shorts/", "/embed/", "/live/")):
+            return parsed.path.split("/")[2] or None
+        video_id = parse_qs(parsed.query).get("v")
+        if video_id:
+            return video_id[0]
+    return None
+
+
+def parse_expire(url):
+    """Return the unix time at which a googlevideo stream URL stops working."""
+    parsed = urlparse(url)
+    expire = parse_qs(parsed.query).get("expire")
+    if expire and expire[0].isdigit():
+        return int(expire[0])
+    match = _EXPIRE_PATH.search(parsed.path)
+    if match:
+        return int(match.group(1))
+    return None
+
+
+def is_fresh(data, margin=120):
+    """True if the stream URL in `data` is known to outlive `margin` seconds."""
+    expires_at = parse_expire(data.get("url", ""))
+    return expires_at is not None and expires_at - margin > time.time()
+
+
+class _Entry:
+    __slots__ = ("data", "size", "expires_at")
+
+    def __init__(self, data, size, expires_at):
+        self.data = data
+        self.size = size
+        self.expires_at = expires_at
+
+
+class StreamCache:
+    """
+    LRU cache of resolved stream info keyed by video id.
+    Entries are dropped before their stream URL expires and evicted
+    least-recently-used once either the entry or the byte budget is exceeded.
+    """
+
+    def __init__(
+        self, max_entries=256, max_bytes=4 * 1024 * 1024, margin=120, default_ttl=1800
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.margin = margin
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @staticmethod
+    def trim(data):
+        return {key: data[key] for key in STREAM_KEYS if key in data}
+
+    def get(self, video_id):
+        entry = self._entries.get(video_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at - self.margin <= time.time():
+            self._remove(video_id)
+            self.expired += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(video_id)
+        self.hits += 1
+        return entry.data
+
+    def put(self, video_id, data):
+        data = self.trim(data)
+        size = len(json.dumps(data, default=str))
+        if size > self.max_bytes:
+            return data
+        expires_at = parse_expire(data.get("url", "")) or time.time() + self.default_ttl
+
+        if video_id in self._entries:
+            self._remove(video_id)
+        self._entries[video_id] = _Entry(data, size, expires_at)
+        self.bytes += size
+
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+        return data
+
+    def _remove(self, video_id):
+        entry = self._entries.pop(video_id)
+        self.bytes -= entry.size
+
+    def __contains__(self, video_id):
+        entry = self._entries.get(video_id)
+        return entry is not None and entry.expires_at - self.margin > time.time()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+        }
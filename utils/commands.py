@@ -0,0 +1,42 @@
+import json
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def command_payload(tree, guild=None):
+    """The JSON Discord receives for the tree's commands, in a stable order."""
+    return sorted(
+        (command.to_dict(tree) for command in tree.get_commands(guild=guild)),
+        key=lambda command: (command.get("type", 1), command["name"]),
+    )
+
+
+def fingerprint(payload):
+    """Hash of everything that affects registration, options and localizations."""
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class SyncState:
+    """Last synced fingerprint per scope (application, or application:guild)."""
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path, encoding="utf-8") as f:
+                self._hashes = json.load(f)
+        except FileNotFoundError:
+            self._hashes = {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable sync state {path}: {e}")
+            self._hashes = {}
+
+    def get(self, scope):
+        return self._hashes.get(scope)
+
+    def set(self, scope, value):
+        self._hashes[scope] = value
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self._hashes, f, indent=4)
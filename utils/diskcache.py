@@ -0,0 +1,153 @@
+import os
+import re
+import uuid
+import asyncio
+import logging
+from collections import OrderedDict
+
+from utils.extractor import load_yt_dlp
+
+logger = logging.getLogger(__name__)
+
+_VIDEO_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class AudioDiskCache:
+    """
+    Content-addressed audio files on disk, keyed by video id.
+    Files live at `<root>/<id[:2]>/<id>.<ext>`, are written to a temporary
+    file and renamed into place, and are evicted least-recently-played
+    first once the directory grows past `max_bytes`.
+    """
+
+    def __init__(self, root, max_bytes, max_file_bytes=50 * 1024 * 1024, downloads=1):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self._tmp = os.path.join(root, "tmp")
+        self._index = OrderedDict()
+        self._populating = set()
+        self._downloads = asyncio.Semaphore(downloads)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._scan()
+
+    def _scan(self):
+        """Rebuild the index from disk, oldest first, and drop stale temp files."""
+        os.makedirs(self._tmp, exist_ok=True)
+        for name in os.listdir(self._tmp):
+            os.remove(os.path.join(self._tmp, name))
+
+        found = []
+        for shard in os.listdir(self.root):
+            shard_path = os.path.join(self.root, shard)
+            if shard == "tmp" or not os.path.isdir(shard_path):
+                continue
+            for name in os.listdir(shard_path):
+                path = os.path.join(shard_path, name)
+                stat = os.stat(path)
+                found.append(
+                    (stat.st_mtime, os.path.splitext(name)[0], path, stat.st_size)
+                )
+
+        for _, video_id, path, size in sorted(found):
+            self._index[video_id] = (path, size)
+            self.bytes += size
+        self._evict()
+
+    def lookup(self, video_id):
+        """Return the cached file for `video_id` and mark it recently used, or None."""
+        entry = self._index.get(video_id)
+        if entry is None or not os.path.exists(entry[0]):
+            if entry is not None:
+                self._forget(video_id)
+            self.misses += 1
+            return None
+        self._index.move_to_end(video_id)
+        # mtime carries the LRU order across restarts.
+        os.utime(entry[0])
+        self.hits += 1
+        self.bytes_saved += entry[1]
+        return entry[0]
+
+    def should_populate(self, video_id):
+        return (
+            bool(_VIDEO_ID.match(video_id))
+            and video_id not in self._index
+            and video_id not in self._populating
+        )
+
+    async def populate(self, video_id, url):
+        """Download `url` into the cache in the background."""
+        if not self.should_populate(video_id):
+            return
+        self._populating.add(video_id)
+        try:
+            async with self._downloads:
+                loop = asyncio.get_running_loop()
+                path = await loop.run_in_executor(None, self._download, video_id, url)
+            if path is not None:
+                size = os.path.getsize(path)
+                self._index[video_id] = (path, size)
+                self.bytes += size
+                self._evict()
+                logger.debug(f"Cached {video_id} on disk ({size} bytes)")
+        except Exception as e:
+            logger.warning(f"Failed to cache {video_id} on disk: {e}")
+        finally:
+            self._populating.discard(video_id)
+
+    def _download(self, video_id, url):
+        prefix = os.path.join(self._tmp, f"{video_id}-{uuid.uuid4().hex}")
+        options = {
+            "format": "ba/b",
+            "outtmpl": f"{prefix}.%(ext)s",
+            "noplaylist": True,
+            "quiet": True,
+            "no_warnings": True,
+            "noprogress": True,
+            "max_filesize": self.max_file_bytes,
+        }
+        try:
+            with load_yt_dlp().YoutubeDL(options) as ydl:
+                info = ydl.extract_info(url, download=True)
+                tmp_path = ydl.prepare_filename(info)
+            if not os.path.exists(tmp_path):
+                return None
+
+            ext = os.path.splitext(tmp_path)[1]
+            shard = os.path.join(self.root, video_id[:2])
+            os.makedirs(shard, exist_ok=True)
+            path = os.path.join(shard, f"{video_id}{ext}")
+            os.replace(tmp_path, path)
+            return path
+        finally:
+            for name in os.listdir(self._tmp):
+                if name.startswith(os.path.basename(prefix)):
+                    os.remove(os.path.join(self._tmp, name))
+
+    def _evict(self):
+        while self.bytes > self.max_bytes and self._index:
+            video_id, (path, _) = next(iter(self._index.items()))
+            self._forget(video_id)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _forget(self, video_id):
+        _, size = self._index.pop(video_id)
+        self.bytes -= size
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._index),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "bytes_saved": self.bytes_saved,
+        }
@@ -0,0 +1,236 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+# Redirect results followed when flat-extracting a playlist.
+MAX_REDIRECTS = 3
+
+
+def load_yt_dlp():
+    """
+    Import yt-dlp on first use rather than at startup; loading its extractor
+    registry is the slowest part of importing the bot.
+    """
+    import yt_dlp as youtube_dl
+
+    # Suppress noise about console usage from errors
+    youtube_dl.utils.bug_reports_message = lambda *args, **kwargs: ""
+    return youtube_dl
+
+
+# YoutubeDL instance owned by each pool worker process.
+_worker_ytdl = None
+
+
+def _init_worker(options):
+    global _worker_ytdl
+    _worker_ytdl = load_yt_dlp().YoutubeDL(options)
+
+
+class ExtractionError(Exception):
+    """Picklable stand-in for errors raised inside a worker process."""
+
+
+def _extract(url, download):
+    try:
+        data = _worker_ytdl.extract_info(url, download=download)
+    except Exception as e:
+        # yt-dlp errors carry unpicklable state, so only the message crosses over.
+        raise ExtractionError(str(e)) from None
+    # Strip anything that cannot be pickled back to the parent.
+    return _worker_ytdl.sanitize_info(data)
+
+
+def _ping():
+    return True
+
+
+class Extractor:
+    """
+    Base extraction backend. Requests are capped globally and per guild,
+    wait in line for at most `timeout` seconds, and are cancelled if the
+    caller gives up first.
+    """
+
+    def __init__(
+        self, max_concurrency=4, guild_concurrency=2, timeout=30, playlist_options=None
+    ):
+        self.playlist_options = playlist_options or {}
+        self.max_concurrency = max_concurrency
+        self.guild_concurrency = guild_concurrency
+        self.timeout = timeout
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._guilds = {}
+
+    async def extract(self, url, *, download=False, guild_id=None, timeout=None):
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        if timeout <= 0:
+            raise asyncio.TimeoutError(f"No time left to extract {url}")
+        return await asyncio.wait_for(
+            self._extract_limited(url, download, guild_id), timeout
+        )
+
+    async def _extract_limited(self, url, download, guild_id):
+        entry = self._guilds.get(guild_id)
+        if entry is None:
+            entry = self._guilds[guild_id] = [
+                asyncio.Semaphore(self.guild_concurrency),
+                0,
+            ]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                async with self._global:
+                    return await self._run(url, download)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._guilds.pop(guild_id, None)
+
+    async def _run(self, url, download):
+        raise NotImplementedError
+
+    async def iter_playlist(self, url, *, batch_size=50, limit=None):
+        """
+        Yield lists of flat playlist entries while yt-dlp pages through the
+        playlist, so callers can enqueue the first tracks before the rest load.
+        Flat extraction is a light metadata walk, so it runs on a thread and
+        does not take an extraction slot.
+        """
+        loop = asyncio.get_running_loop()
+        batches = asyncio.Queue()
+        stopped = threading.Event()
+
+        def put(item):
+            if not stopped.is_set():
+                loop.call_soon_threadsafe(batches.put_nowait, item)
+
+        def produce():
+            try:
+                with load_yt_dlp().YoutubeDL(self.playlist_options) as ydl:
+                    info = ydl.extract_info(url, download=False, process=False)
+                    # Unprocessed results can be redirects, e.g. a /watch?list=
+                    # link points at /playlist?list=; follow them to the entries.
+                    for _ in range(MAX_REDIRECTS):
+                        if (info or {}).get("_type") not in ("url", "url_transparent"):
+                            break
+                        info = ydl.extract_info(
+                            info["url"], download=False, process=False
+                        )
+                    batch = []
+                    for count, entry in enumerate((info or {}).get("entries") or (), 1):
+                        if stopped.is_set():
+                            return
+                        batch.append(entry)
+                        if len(batch) >= batch_size:
+                            put(batch)
+                            batch = []
+                        if limit and count >= limit:
+                            break
+                    if batch:
+                        put(batch)
+            except Exception as e:
+                put(e)
+            finally:
+                put(None)
+
+        loop.run_in_executor(None, produce)
+        try:
+            while True:
+                item = await batches.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stopped.set()
+
+    def warm(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class ThreadExtractor(Extractor):
+    """
+    Runs extraction on a pool of threads, one per extraction slot. `YoutubeDL`
+    is not thread-safe, so each thread builds and keeps its own.
+    """
+
+    def __init__(self, options, **kwargs):
+        super().__init__(**kwargs)
+        self.options = options
+        self._local = threading.local()
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_concurrency, thread_name_prefix="ytdl"
+            )
+        return self._pool
+
+    def _extract(self, url, download):
+        ytdl = getattr(self._local, "ytdl", None)
+        if ytdl is None:
+            ytdl = self._local.ytdl = load_yt_dlp().YoutubeDL(self.options)
+        return ytdl.extract_info(url, download=download)
+
+    async def _run(self, url, download):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_pool(), self._extract, url, download
+        )
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+class ProcessExtractor(Extractor):
+    """
+    Runs extraction in a pool of worker processes, each holding its own
+    `YoutubeDL`, so yt-dlp never competes with the event loop for the GIL.
+    """
+
+    def __init__(self, options, workers=2, **kwargs):
+        super().__init__(**kwargs)
+        self.options = options
+        self.workers = workers
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.options,),
+            )
+        return self._pool
+
+    async def _run(self, url, download):
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._get_pool(), _extract, url, download)
+        except BrokenProcessPool:
+            logger.error("Extraction worker died; restarting the pool")
+            self.close()
+            raise
+
+    def warm(self):
+        """Start every worker up front so the first request pays no spawn cost."""
+        pool = self._get_pool()
+        for _ in range(self.workers):
+            pool.submit(_ping)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
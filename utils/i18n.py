@@ -0,0 +1,165 @@
+import sys
+import json
+import logging
+from collections import OrderedDict
+from string import Formatter
+
+import discord
+
+from config import LOCALE_DEFAULT, LOCALE_USER_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+LOCALE_DIR = "locales"
+# Locales with a file in LOCALE_DIR. Missing keys fall back to FALLBACK_LOCALE.
+LOCALES = ("en", "ko", "ja", "zh")
+FALLBACK_LOCALE = "en"
+
+
+def compile_template(text):
+    """
+    Resolve a template once at load time: text without placeholders becomes
+    the final string, and the rest keep a bound `str.format` to call.
+    """
+    if any(field is not None for _, field, _, _ in Formatter().parse(text)):
+        return text.format
+    return text.format()
+
+
+def placeholders(text):
+    return {field for _, field, _, _ in Formatter().parse(text) if field is not None}
+
+
+class LocaleCatalog:
+    """Translations per locale, each file read and compiled on first use."""
+
+    def __init__(self, directory=LOCALE_DIR, locales=LOCALES, fallback=FALLBACK_LOCALE):
+        self.directory = directory
+        self.locales = locales
+        self.fallback = fallback
+        self._catalogs = {}
+
+    def read(self, locale):
+        with open(f"{self.directory}/{locale}.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def catalog(self, locale):
+        catalog = self._catalogs.get(locale)
+        if catalog is None:
+            catalog = self._catalogs[locale] = {
+                key: compile_template(text) for key, text in self.read(locale).items()
+            }
+        return catalog
+
+    def translate(self, key, locale=FALLBACK_LOCALE, **kwargs):
+        """
+        Get the translation for the given key and locale, falling back to the
+        fallback locale for that key, then to the key itself.
+        """
+        if locale not in self.locales:
+            locale = self.fallback
+        template = self.catalog(locale).get(key)
+        if template is None and locale != self.fallback:
+            template = self.catalog(self.fallback).get(key)
+        if template is None:
+            return key
+        if isinstance(template, str):
+            return template
+        try:
+            return template(**kwargs)
+        except (KeyError, IndexError) as e:
+            logger.warning(f"Missing placeholder {e} for {key!r} in {locale}")
+            return template.__self__
+
+    def validate(self):
+        """Return a list of problems: missing keys and mismatched placeholders."""
+        texts = {locale: self.read(locale) for locale in self.locales}
+        reference = texts[self.fallback]
+        keys = set().union(*texts.values())
+        problems = []
+        for locale, entries in texts.items():
+            for key in sorted(keys - entries.keys()):
+                problems.append(f"{locale}: missing key {key!r}")
+            for key in sorted(entries.keys() & reference.keys()):
+                expected = placeholders(reference[key])
+                found = placeholders(entries[key])
+                if found != expected:
+                    problems.append(
+                        f"{locale}: {key!r} has placeholders {sorted(found)}, "
+                        f"expected {sorted(expected)}"
+                    )
+        return problems
+
+
+class LocaleResolver:
+    """
+    Picks the locale to answer in: the interaction's user locale, else the
+    one last seen for that user, else the guild's locale, else the default.
+    """
+
+    def __init__(self, supported=LOCALES, default=LOCALE_DEFAULT, cache_size=10000):
+        self.supported = supported
+        self.default = default
+        self.cache_size = cache_size
+        self._users = OrderedDict()
+
+    def normalize(self, locale):
+        """Map a Discord locale like "en-US" or "zh-TW" to a supported one."""
+        if locale is None:
+            return None
+        language = str(locale).split("-")[0].lower()
+        return language if language in self.supported else None
+
+    def remember(self, user_id, locale):
+        self._users[user_id] = locale
+        self._users.move_to_end(user_id)
+        if len(self._users) > self.cache_size:
+            self._users.popitem(last=False)
+
+    def resolve(self, source):
+        """Resolve from an `Interaction`, a command context, a message or a guild."""
+        if isinstance(source, discord.Interaction):
+            interaction, user = source, source.user
+        elif isinstance(source, (discord.Message, discord.Guild)):
+            # Only the guild's locale applies; `Message.interaction` is deprecated.
+            interaction, user = None, None
+        else:
+            interaction = getattr(source, "interaction", None)
+            user = getattr(source, "author", None)
+
+        locale = self.normalize(getattr(interaction, "locale", None))
+        if locale is not None:
+            if user is not None:
+                self.remember(user.id, locale)
+            return locale
+
+        if user is not None and user.id in self._users:
+            self._users.move_to_end(user.id)
+            return self._users[user.id]
+
+        guild_locale = getattr(interaction, "guild_locale", None)
+        if guild_locale is None:
+            guild = (
+                source
+                if isinstance(source, discord.Guild)
+                else getattr(source, "guild", None)
+            )
+            guild_locale = getattr(guild, "preferred_locale", None)
+        return self.normalize(guild_locale) or self.default
+
+
+catalog = LocaleCatalog()
+locale_resolver = LocaleResolver(cache_size=LOCALE_USER_CACHE_SIZE)
+
+
+def get_translation(key, locale=FALLBACK_LOCALE, **kwargs):
+    return catalog.translate(key, locale, **kwargs)
+
+
+if __name__ == "__main__":
+    # Checks that every key exists in every locale: python -m utils.i18n
+    problems = catalog.validate()
+    for problem in problems:
+        print(problem)
+    print(f"{len(problems)} problems in {len(catalog.locales)} locales")
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,92 @@
+import json
+import queue
+import random
+import logging
+import contextvars
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Fields attached to every record logged from the current task.
+log_context = contextvars.ContextVar("log_context", default={})
+
+
+def bind_log_context(**fields):
+    """Attach `fields` (e.g. guild_id, interaction_id) to logs from this task."""
+    log_context.set({**log_context.get(), **fields})
+
+
+class ContextFilter(logging.Filter):
+    """Copy the task's log context onto the record before it leaves the thread."""
+
+    def filter(self, record):
+        context = log_context.get()
+        record.guild_id = context.get("guild_id")
+        record.interaction_id = context.get("interaction_id")
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of DEBUG records; higher levels always pass."""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    def __init__(self, instance=None):
+        super().__init__()
+        self.instance = instance
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "guild_id": getattr(record, "guild_id", None),
+            "interaction_id": getattr(record, "interaction_id", None),
+        }
+        if self.instance:
+            entry["instance"] = self.instance
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def setup_logging(path, debug_sample_rate=1.0, json_format=True, instance=None):
+    """
+    Route all logging through a queue so callers on the event loop never
+    touch the disk; a background listener thread does formatting, writes
+    and rotation. Returns the started listener, to be stopped on shutdown.
+    `instance` (e.g. a shard label) tags every line from this process.
+    """
+    file_handler = RotatingFileHandler(path, maxBytes=5 * 1024 * 1024, backupCount=5)
+    file_handler.setLevel(logging.DEBUG)
+
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.INFO)
+
+    prefix = f"[{instance}] " if instance else ""
+    formatter = logging.Formatter(
+        f"%(asctime)s - {prefix}%(name)s - %(levelname)s - %(message)s"
+    )
+    file_handler.setFormatter(JsonFormatter(instance) if json_format else formatter)
+    console_handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    queue_handler.addFilter(SamplingFilter(debug_sample_rate))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(logging.INFO)
+
+    listener = QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    listener.start()
+    return listener
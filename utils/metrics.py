@@ -0,0 +1,131 @@
+import os
+import time
+import logging
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from config import METRICS_SLOW_SECONDS
+
+logger = logging.getLogger("PlaygroundBot")
+
+# Upper bounds in seconds, Prometheus-style; the last bucket is +Inf.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimate the `q` quantile by interpolating within its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = BUCKETS[index - 1] if index else 0.0
+                upper = BUCKETS[index] if index < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return BUCKETS[-1]
+
+
+class Metrics:
+    """
+    Per-stage latency histograms for the play pipeline, kept globally and
+    per guild. Observations over a stage's slow threshold are logged with
+    their context.
+    """
+
+    def __init__(self, slow_thresholds=None):
+        self.slow_thresholds = slow_thresholds or {}
+        self.stages = {}
+        self.guilds = {}
+
+    def observe(self, stage, seconds, guild_id=None, **context):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = Histogram()
+        histogram.observe(seconds)
+
+        if guild_id is not None:
+            guild_stages = self.guilds.setdefault(guild_id, {})
+            histogram = guild_stages.get(stage)
+            if histogram is None:
+                histogram = guild_stages[stage] = Histogram()
+            histogram.observe(seconds)
+
+        threshold = self.slow_thresholds.get(stage)
+        if threshold is not None and seconds > threshold:
+            details = " ".join(f"{key}={value}" for key, value in context.items())
+            logger.warning(
+                f"Slow {stage}: {seconds:.2f}s (guild={guild_id} {details})".rstrip()
+            )
+
+    @contextmanager
+    def timer(self, stage, guild_id=None, **context):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started, guild_id, **context)
+
+    def summary(self, guild_id=None):
+        """Return {stage: (count, p50, p90, p99)} globally or for one guild."""
+        stages = self.stages if guild_id is None else self.guilds.get(guild_id, {})
+        return {
+            stage: (
+                histogram.count,
+                histogram.quantile(0.5),
+                histogram.quantile(0.9),
+                histogram.quantile(0.99),
+            )
+            for stage, histogram in sorted(stages.items())
+        }
+
+    def render_prometheus(self, gauges=None):
+        """Render every histogram (and optional gauges) in Prometheus text format."""
+        lines = [
+            "# HELP playground_stage_seconds Play pipeline stage latency.",
+            "# TYPE playground_stage_seconds histogram",
+        ]
+        for stage, histogram in sorted(self.stages.items()):
+            lines.extend(_histogram_lines(histogram, f'stage="{stage}"'))
+        for guild_id, stages in self.guilds.items():
+            for stage, histogram in sorted(stages.items()):
+                labels = f'stage="{stage}",guild="{guild_id}"'
+                lines.extend(_histogram_lines(histogram, labels))
+        for name, value in (gauges or {}).items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _histogram_lines(histogram, labels):
+    cumulative = 0
+    for bound, count in zip(BUCKETS, histogram.counts):
+        cumulative += count
+        yield f'playground_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}'
+    yield f'playground_stage_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}'
+    yield f"playground_stage_seconds_sum{{{labels}}} {histogram.sum}"
+    yield f"playground_stage_seconds_count{{{labels}}} {histogram.count}"
+
+
+def write_atomic(path, text):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+metrics = Metrics(slow_thresholds=METRICS_SLOW_SECONDS)
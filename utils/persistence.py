@@ -0,0 +1,195 @@
+import json
+import time
+import asyncio
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.track import Track
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS guild_state (
+    guild_id INTEGER PRIMARY KEY,
+    voice_channel_id INTEGER,
+    text_channel_id INTEGER,
+    loop INTEGER NOT NULL,
+    volume REAL NOT NULL,
+    audio_mode TEXT NOT NULL,
+    current TEXT,
+    queue TEXT NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+# Track fields worth keeping; resolved streams expire, so they are dropped.
+TRACK_FIELDS = ("id", "title", "channel", "duration", "thumbnail", "requester_id")
+
+
+def encode_track(track):
+    return [getattr(track, field) for field in TRACK_FIELDS]
+
+
+def decode_track(fields):
+    return Track(*fields)
+
+
+class SavedState:
+    """A guild's row as loaded; tracks are decoded only when asked for."""
+
+    def __init__(self, row):
+        (
+            self.guild_id,
+            self.voice_channel_id,
+            self.text_channel_id,
+            loop,
+            self.volume,
+            self.audio_mode,
+            self._current,
+            self._queue,
+        ) = row
+        self.loop = bool(loop)
+
+    @property
+    def current(self):
+        return decode_track(json.loads(self._current)) if self._current else None
+
+    @property
+    def queue(self):
+        return [decode_track(fields) for fields in json.loads(self._queue)]
+
+
+class QueueStore:
+    """
+    Write-behind SQLite snapshots of each guild's queue, current track and
+    settings. `sync` only writes guilds whose state changed since the last
+    write, and all database work runs on one dedicated thread.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # Set once restoring starts; held so the task can't be garbage collected.
+        self.restore_task = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="queue-store"
+        )
+        self._db = None
+        self._saved = {}
+
+    def _connect(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.path)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(SCHEMA)
+        return self._db
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def load(self):
+        """Return the saved state of every guild."""
+        rows = await self._run(self._load)
+        return [SavedState(row) for row in rows]
+
+    def _load(self):
+        return (
+            self._connect()
+            .execute(
+                "SELECT guild_id, voice_channel_id, text_channel_id, loop, volume,"
+                " audio_mode, current, queue FROM guild_state"
+            )
+            .fetchall()
+        )
+
+    async def sync(self, players, bot):
+        """Write players whose state changed and drop players that are gone."""
+        changed = []
+        live = set()
+        for player in players:
+            guild = bot.get_guild(player.guild_id)
+            voice_client = guild.voice_client if guild else None
+            if voice_client is None or not (player.current or player.queue):
+                continue
+            live.add(player.guild_id)
+
+            key = (
+                player.queue.version,
+                player.current.id if player.current else None,
+                player.loop,
+                player.volume,
+                player.audio_mode,
+                voice_client.channel.id,
+                player.text_channel_id,
+            )
+            if self._saved.get(player.guild_id) != key:
+                self._saved[player.guild_id] = key
+                # Tracks are immutable, so a shallow copy is a safe snapshot;
+                # JSON encoding happens on the store's thread.
+                changed.append(
+                    (player.guild_id, *key[2:], player.current, list(player.queue))
+                )
+
+        removed = [guild_id for guild_id in self._saved if guild_id not in live]
+        for guild_id in removed:
+            del self._saved[guild_id]
+
+        if changed or removed:
+            try:
+                await self._run(self._write, changed, removed)
+            except sqlite3.Error as e:
+                logger.error(f"Failed to save queues: {e}")
+                # Forget what was written so the next sync retries everything.
+                self._saved.clear()
+
+    def _write(self, changed, removed):
+        now = time.time()
+        rows = [
+            (
+                guild_id,
+                voice_channel_id,
+                text_channel_id,
+                int(loop),
+                volume,
+                audio_mode,
+                json.dumps(encode_track(current)) if current else None,
+                json.dumps([encode_track(track) for track in queue]),
+                now,
+            )
+            for (
+                guild_id,
+                loop,
+                volume,
+                audio_mode,
+                voice_channel_id,
+                text_channel_id,
+                current,
+                queue,
+            ) in changed
+        ]
+        db = self._connect()
+        with db:
+            db.executemany(
+                "INSERT OR REPLACE INTO guild_state VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            db.executemany(
+                "DELETE FROM guild_state WHERE guild_id = ?",
+                [(guild_id,) for guild_id in removed],
+            )
+
+    async def forget(self, guild_id):
+        """Drop a guild's saved state, e.g. when it can't be resumed."""
+        self._saved.pop(guild_id, None)
+        await self._run(self._write, [], [guild_id])
+
+    def close(self):
+        self._executor.submit(self._close)
+        self._executor.shutdown(wait=True)
+
+    def _close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
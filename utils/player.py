@@ -0,0 +1,137 @@
+import time
+import asyncio
+import logging
+
+from utils.logs import bind_log_context
+from utils.track_queue import TrackQueue
+
+logger = logging.getLogger(__name__)
+
+
+class TrackEnd:
+    """Signal sent from the audio player thread when a track finishes."""
+
+    __slots__ = ("ctx", "error", "signalled_at")
+
+    def __init__(self, ctx, error):
+        self.ctx = ctx
+        self.error = error
+        self.signalled_at = time.perf_counter()
+
+
+class GuildPlayer:
+    """Playback state owned by a single guild."""
+
+    def __init__(self, guild_id, volume=0.2, audio_mode="pcm", on_track_end=None):
+        self.guild_id = guild_id
+        self.on_track_end = on_track_end
+        self.queue = TrackQueue()
+        self.current = None
+        self.loop = False
+        self.volume = volume
+        self.audio_mode = audio_mode
+        self.now_playing_message = None
+        # Where playback was last started from; saved so a restart can resume there.
+        self.text_channel_id = None
+        self.np_update_ctx = None
+        self.np_update_locale = None
+        self.np_update_task = None
+        self.last_active = time.monotonic()
+        # When the bot was left without listeners in its voice channel.
+        self.alone_since = None
+        self.prefetch_url = None
+        self.prefetch_task = None
+        self.prefetched = None
+        self.events = asyncio.Queue()
+        self.events_task = None
+        self.closed = False
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+    def take_prefetched(self, url):
+        """Hand over the pre-warmed source for `url`, if one is ready."""
+        if self.prefetched is None or self.prefetched[0] != url:
+            return None
+        source = self.prefetched[1]
+        self.prefetch_url = None
+        self.prefetched = None
+        return source
+
+    def invalidate_prefetch(self):
+        if self.prefetch_task is not None and not self.prefetch_task.done():
+            self.prefetch_task.cancel()
+        self.prefetch_url = None
+        self.prefetch_task = None
+        if self.prefetched is not None:
+            self.prefetched[1].cleanup()
+            self.prefetched = None
+
+    def signal_track_end(self, loop, ctx, error):
+        """Thread-safe: queue a track-end event without waiting on the loop."""
+        loop.call_soon_threadsafe(self._push_event, TrackEnd(ctx, error))
+
+    def _push_event(self, event):
+        if self.closed:
+            return
+        self.events.put_nowait(event)
+        if self.events_task is None or self.events_task.done():
+            self.events_task = asyncio.create_task(self._consume_events())
+
+    async def _consume_events(self):
+        bind_log_context(guild_id=self.guild_id)
+        while not self.events.empty():
+            event = self.events.get_nowait()
+            try:
+                await self.on_track_end(self, event)
+            except Exception as e:
+                logger.error(f"Error handling track end in guild {self.guild_id}: {e}")
+
+    def close(self):
+        self.closed = True
+        self.invalidate_prefetch()
+        for task in (self.events_task, self.np_update_task):
+            if task is not None and not task.done():
+                task.cancel()
+
+
+class PlayerManager:
+    """Registry of `GuildPlayer` objects keyed by guild id."""
+
+    def __init__(self, audio_mode="pcm", on_track_end=None):
+        self.audio_mode = audio_mode
+        self.on_track_end = on_track_end
+        self._players = {}
+
+    def get(self, guild_id):
+        """Return the player for `guild_id`, creating it on first use."""
+        player = self._players.get(guild_id)
+        if player is None:
+            player = self._players[guild_id] = GuildPlayer(
+                guild_id, audio_mode=self.audio_mode, on_track_end=self.on_track_end
+            )
+            logger.debug(f"Created player for guild {guild_id}")
+        return player
+
+    def rebind(self, on_track_end):
+        """Point every player at a new handler, e.g. after the cog is reloaded."""
+        self.on_track_end = on_track_end
+        for player in self._players.values():
+            player.on_track_end = on_track_end
+
+    def peek(self, guild_id):
+        """Return the player for `guild_id` without creating one."""
+        return self._players.get(guild_id)
+
+    def discard(self, guild_id):
+        player = self._players.pop(guild_id, None)
+        if player is not None:
+            player.close()
+            logger.debug(f"Tore down player for guild {guild_id}")
+        return player
+
+    def __iter__(self):
+        return iter(list(self._players.values()))
+
+    def __len__(self):
+        return len(self._players)
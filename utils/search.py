@@ -0,0 +1,71 @@
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class SearchService:
+    """
+    Runs YouTube searches in an executor so they never block the event loop.
+    Results are kept in a TTL+LRU cache keyed by (normalized keyword, limit),
+    and concurrent lookups for the same key share a single request.
+    """
+
+    def __init__(self, ttl=600, max_entries=512):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(keyword):
+        return " ".join(keyword.casefold().split())
+
+    async def search(self, keyword, limit=1):
+        key = (self.normalize(keyword), limit)
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            expires_at, results = cached
+            if expires_at > time.monotonic():
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return results
+            del self._cache[key]
+
+        future = self._inflight.get(key)
+        if future is None:
+            self.misses += 1
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(None, self._fetch, key[0], limit)
+            future.add_done_callback(lambda f: self._complete(key, f))
+            self._inflight[key] = future
+        # Shield so one cancelled caller does not cancel the shared lookup.
+        return await asyncio.shield(future)
+
+    def _fetch(self, keyword, limit):
+        # Imported here, on the executor thread, to keep it out of startup.
+        from youtubesearchpython import VideosSearch
+
+        return VideosSearch(keyword, limit=limit).result()["result"]
+
+    def _complete(self, key, future):
+        self._inflight.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        self._cache[key] = (time.monotonic() + self.ttl, future.result())
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def stats(self):
+        return {
+            "entries": len(self._cache),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,25 @@
+import os
+
+
+def shard_ranges(shard_count, per_process):
+    """Split shard ids 0..shard_count-1 into consecutive per-process ranges."""
+    return [
+        list(range(start, min(start + per_process, shard_count)))
+        for start in range(0, shard_count, per_process)
+    ]
+
+
+def shard_label(shard_ids):
+    if not shard_ids:
+        return None
+    if len(shard_ids) == 1:
+        return f"shard-{shard_ids[0]}"
+    return f"shard-{shard_ids[0]}-{shard_ids[-1]}"
+
+
+def instance_path(path, label):
+    """`bot.log` -> `bot.shard-0-3.log`, so processes never share a file."""
+    if not label:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{label}{ext}"
@@ -0,0 +1,114 @@
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+from utils.cache import extract_video_id
+from utils.search import SearchService
+
+# Words of a title that get their own index key, so "beats" finds "lofi beats".
+MAX_KEY_WORDS = 8
+
+
+def index_keys(text):
+    """Every word-start suffix of the normalized text, e.g. "a b c", "b c", "c"."""
+    words = SearchService.normalize(text).split()[:MAX_KEY_WORDS]
+    return {" ".join(words[index:]) for index in range(len(words))}
+
+
+class PrefixIndex:
+    """
+    Tracks indexed by normalized title and search keyword. Keys live in one
+    sorted list, so a prefix query is a bisect plus a short forward scan.
+    The least recently added track is evicted past `max_tracks`.
+    """
+
+    def __init__(self, max_tracks):
+        self.max_tracks = max_tracks
+        self._tracks = OrderedDict()
+        self._keys = []
+
+    def add(self, track, keyword=None):
+        keys = index_keys(track.title)
+        if keyword:
+            keys.add(SearchService.normalize(keyword))
+        entry = self._tracks.pop(track.id, None)
+        if entry is not None:
+            self._remove_keys(track.id, entry[1])
+            keys |= entry[1]
+        self._tracks[track.id] = (track, keys)
+        for key in keys:
+            insort(self._keys, (key, track.id))
+
+        while len(self._tracks) > self.max_tracks:
+            track_id, (_, old_keys) = self._tracks.popitem(last=False)
+            self._remove_keys(track_id, old_keys)
+
+    def _remove_keys(self, track_id, keys):
+        for key in keys:
+            index = bisect_left(self._keys, (key, track_id))
+            if index < len(self._keys) and self._keys[index] == (key, track_id):
+                del self._keys[index]
+
+    def get(self, track_id):
+        entry = self._tracks.get(track_id)
+        return entry[0] if entry else None
+
+    def search(self, text, limit):
+        prefix = SearchService.normalize(text)
+        if not prefix:
+            # Nothing typed yet: most recent first.
+            return [track for track, _ in reversed(self._tracks.values())][:limit]
+
+        found = {}
+        index = bisect_left(self._keys, (prefix,))
+        while index < len(self._keys) and len(found) < limit:
+            key, track_id = self._keys[index]
+            if not key.startswith(prefix):
+                break
+            found.setdefault(track_id, self._tracks[track_id][0])
+            index += 1
+        return list(found.values())
+
+    def __len__(self):
+        return len(self._tracks)
+
+
+class SuggestionService:
+    """
+    Local autocomplete for /play and /search, from each guild's play history
+    and from tracks seen in search results. Never touches the network.
+    """
+
+    def __init__(self, history_size=200, results_size=2000):
+        self.history_size = history_size
+        self.results = PrefixIndex(results_size)
+        self.history = {}
+
+    def add_played(self, guild_id, track):
+        index = self.history.get(guild_id)
+        if index is None:
+            index = self.history[guild_id] = PrefixIndex(self.history_size)
+        # Drop the resolved stream; it expires and is large.
+        index.add(track.with_stream(None) if track.stream else track)
+
+    def add_results(self, keyword, tracks):
+        for track in tracks:
+            self.results.add(track, keyword)
+
+    def suggest(self, guild_id, text, limit=25):
+        """Guild history first, then other known tracks, without duplicates."""
+        suggestions = {}
+        indexes = (self.history.get(guild_id), self.results)
+        for index in indexes:
+            if index is None:
+                continue
+            for track in index.search(text, limit):
+                suggestions.setdefault(track.id, track)
+        return list(suggestions.values())[:limit]
+
+    def lookup(self, guild_id, keyword):
+        """Return the known `Track` a suggestion value (a watch URL) points at."""
+        video_id = extract_video_id(keyword.strip())
+        if video_id is None:
+            return None
+        index = self.history.get(guild_id)
+        return (index and index.get(video_id)) or self.results.get(video_id)
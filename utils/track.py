@@ -0,0 +1,91 @@
+from dataclasses import dataclass, field, replace
+from typing import Optional
+
+from utils.utils import ellipsis
+
+
+def parse_duration(text):
+    """Convert a "H:MM:SS" / "M:SS" duration to seconds, or None for live streams."""
+    if not text:
+        return None
+    seconds = 0
+    try:
+        for part in text.split(":"):
+            seconds = seconds * 60 + int(part)
+    except ValueError:
+        return None
+    return seconds
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return "-"
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+@dataclass(frozen=True, slots=True)
+class Track:
+    """The parts of a search result the player actually uses."""
+
+    id: str
+    title: str
+    channel: str
+    duration: Optional[int]
+    thumbnail: Optional[str]
+    requester_id: Optional[int] = None
+    # Cached stream data; not part of the track's identity, and dicts don't hash.
+    stream: Optional[dict] = field(default=None, compare=False)
+    # Pre-truncated title for queue listings, computed once per track.
+    short_title: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "short_title", ellipsis(self.title, 45))
+
+    @property
+    def url(self):
+        return f"https://www.youtube.com/watch?v={self.id}"
+
+    @property
+    def display_duration(self):
+        return format_duration(self.duration)
+
+    @classmethod
+    def from_search(cls, result, requester_id=None):
+        """Build a track from a `VideosSearch` result dict."""
+        thumbnails = result.get("thumbnails") or [{}]
+        return cls(
+            id=result["id"],
+            title=result["title"],
+            channel=(result.get("channel") or {}).get("name", ""),
+            duration=parse_duration(result.get("duration")),
+            thumbnail=thumbnails[0].get("url"),
+            requester_id=requester_id,
+        )
+
+    @classmethod
+    def from_entry(cls, entry, requester_id=None):
+        """Build a track from a flat yt-dlp playlist entry."""
+        thumbnails = entry.get("thumbnails")
+        if thumbnails:
+            thumbnail = thumbnails[-1].get("url")
+        else:
+            thumbnail = f"https://i.ytimg.com/vi/{entry['id']}/hqdefault.jpg"
+        duration = entry.get("duration")
+        return cls(
+            id=entry["id"],
+            title=entry.get("title") or entry["id"],
+            channel=entry.get("channel") or entry.get("uploader") or "",
+            duration=int(duration) if duration else None,
+            thumbnail=thumbnail,
+            requester_id=requester_id,
+        )
+
+    def with_requester(self, requester_id):
+        return replace(self, requester_id=requester_id)
+
+    def with_stream(self, data):
+        return replace(self, stream=data)
@@ -0,0 +1,108 @@
+import random
+import itertools
+from collections import Counter, deque
+
+# Shared across queues so a version is never reused, even by a new queue.
+_versions = itertools.count(1)
+
+
+class TrackQueue:
+    """
+    Deque-backed queue of `Track` objects. Dequeue is O(1), membership by
+    track id is O(1), and positional move/remove run on the deque in C.
+    `version` changes on every mutation, so callers can cheaply tell whether
+    the queue changed since they last looked.
+    """
+
+    def __init__(self, tracks=()):
+        self._items = deque()
+        self._ids = Counter()
+        self.version = next(_versions)
+        self.extend(tracks)
+
+    def append(self, track):
+        self._items.append(track)
+        self._ids[track.id] += 1
+        self.version = next(_versions)
+
+    def extend(self, tracks):
+        for track in tracks:
+            self.append(track)
+
+    def popleft(self):
+        track = self._items.popleft()
+        self._forget(track)
+        self.version = next(_versions)
+        return track
+
+    def peek(self):
+        return self._items[0] if self._items else None
+
+    def remove_at(self, index):
+        track = self._items[index]
+        del self._items[index]
+        self._forget(track)
+        self.version = next(_versions)
+        return track
+
+    def remove_id(self, track_id):
+        """Remove the first track with `track_id`; return it, or None if absent."""
+        if track_id not in self._ids:
+            return None
+        for index, track in enumerate(self._items):
+            if track.id == track_id:
+                return self.remove_at(index)
+
+    def move(self, source, destination):
+        track = self._items[source]
+        del self._items[source]
+        self._items.insert(destination, track)
+        self.version = next(_versions)
+        return track
+
+    def shuffle(self):
+        items = list(self._items)
+        random.shuffle(items)
+        self._items = deque(items)
+        self.version = next(_versions)
+
+    def dedupe(self):
+        """Drop repeated tracks, keeping the first occurrence of each id."""
+        if len(self._ids) == len(self._items):
+            return 0
+        seen = set()
+        kept = deque()
+        for track in self._items:
+            if track.id not in seen:
+                seen.add(track.id)
+                kept.append(track)
+        removed = len(self._items) - len(kept)
+        self._items = kept
+        self._ids = Counter({track_id: 1 for track_id in seen})
+        self.version = next(_versions)
+        return removed
+
+    def clear(self):
+        self._items.clear()
+        self._ids.clear()
+        self.version = next(_versions)
+
+    def _forget(self, track):
+        self._ids[track.id] -= 1
+        if not self._ids[track.id]:
+            del self._ids[track.id]
+
+    def __contains__(self, track_id):
+        return track_id in self._ids
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __bool__(self):
+        return bool(self._items)
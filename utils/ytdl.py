@@ -1,9 +1,28 @@
-import asyncio
+import logging
+import threading
+
 import discord
-import yt_dlp as youtube_dl
 
-# Suppress noise about console usage from errors
-youtube_dl.utils.bug_reports_message = lambda: ""
+from config import (
+    STREAM_CACHE_SIZE,
+    STREAM_CACHE_MAX_BYTES,
+    EXTRACTOR_BACKEND,
+    EXTRACTOR_WORKERS,
+    EXTRACTOR_MAX_CONCURRENCY,
+    EXTRACTOR_GUILD_CONCURRENCY,
+    EXTRACTOR_TIMEOUT,
+    DISK_CACHE_ENABLED,
+    DISK_CACHE_DIR,
+    DISK_CACHE_MAX_BYTES,
+)
+from urllib.parse import urlparse, parse_qs
+
+from utils.cache import StreamCache, extract_video_id
+from utils.diskcache import AudioDiskCache
+from utils.metrics import metrics
+from utils.extractor import ThreadExtractor, ProcessExtractor, load_yt_dlp
+
+logger = logging.getLogger(__name__)
 
 ytdl_format_options = {
     #'format': 'bestaudio',
@@ -29,16 +48,114 @@ ytdl_format_options = {
     ],
 }
 
+# Flat, lazy extraction used to page through playlists without resolving streams.
+ytdl_playlist_options = {
+    "extract_flat": "in_playlist",
+    "lazy_playlist": True,
+    "skip_download": True,
+    "ignoreerrors": True,
+    "quiet": True,
+    "no_warnings": True,
+}
+
 ffmpeg_options = {
     "before_options": "-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5",
     # "options": "-vn -ar 48000 -b:a 320k",
     "options": "-vn",
 }
 
-ytdl = youtube_dl.YoutubeDL(ytdl_format_options)
+_ytdl = None
+_ytdl_lock = threading.Lock()
+
+
+def get_ytdl():
+    """
+    The event loop's `YoutubeDL`, created (and yt-dlp imported) on first use.
+    Extraction threads each use their own; see `ThreadExtractor`.
+    """
+    global _ytdl
+    if _ytdl is None:
+        with _ytdl_lock:
+            if _ytdl is None:
+                _ytdl = load_yt_dlp().YoutubeDL(ytdl_format_options)
+    return _ytdl
+
+
+def warm_imports():
+    """Load the heavy libraries deferred at startup; run off the event loop."""
+    get_ytdl()
+    import youtubesearchpython  # noqa: F401
+
+
+extractor_limits = {
+    "max_concurrency": EXTRACTOR_MAX_CONCURRENCY,
+    "guild_concurrency": EXTRACTOR_GUILD_CONCURRENCY,
+    "timeout": EXTRACTOR_TIMEOUT,
+    "playlist_options": ytdl_playlist_options,
+}
+if EXTRACTOR_BACKEND == "process":
+    extractor = ProcessExtractor(
+        ytdl_format_options, workers=EXTRACTOR_WORKERS, **extractor_limits
+    )
+else:
+    extractor = ThreadExtractor(ytdl_format_options, **extractor_limits)
+
+stream_cache = StreamCache(
+    max_entries=STREAM_CACHE_SIZE, max_bytes=STREAM_CACHE_MAX_BYTES
+)
+disk_cache = (
+    AudioDiskCache(DISK_CACHE_DIR, DISK_CACHE_MAX_BYTES) if DISK_CACHE_ENABLED else None
+)
+
+
+def is_playlist_url(text):
+    """
+    True if `text` links to a YouTube playlist rather than a song in one.
+    A `/watch` link with a `v` plays just that video, as `noplaylist` does,
+    and auto-generated Mixes (`list=RD...`) are never imported.
+    """
+    parsed = urlparse(text.strip())
+    if "youtube" not in parsed.netloc.lower():
+        return False
+    query = parse_qs(parsed.query)
+    playlist_id = query.get("list", [""])[0]
+    if not playlist_id or playlist_id.startswith("RD"):
+        return False
+    return parsed.path == "/playlist" or (parsed.path == "/watch" and "v" not in query)
+
+
+# FFmpeg-backed sources not cleaned up yet. Held strongly, so an orphaned
+# source can't be garbage collected while its process is still running.
+# The audio player thread discards from it too, so iterate over a copy.
+live_sources = set()
+
+
+class TrackedSourceMixin:
+    """Registers the source in `live_sources` until it is cleaned up."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        live_sources.add(self)
 
+    def cleanup(self):
+        live_sources.discard(self)
+        super().cleanup()
 
-class YTDLSource(discord.PCMVolumeTransformer):
+
+class FirstFrameMixin:
+    """Calls `on_first_frame` once, from the audio thread, after the first packet."""
+
+    on_first_frame = None
+
+    def read(self):
+        packet = super().read()
+        if packet and self.on_first_frame is not None:
+            callback, self.on_first_frame = self.on_first_frame, None
+            callback()
+        return packet
+
+
+class YTDLSource(FirstFrameMixin, TrackedSourceMixin, discord.PCMVolumeTransformer):
     def __init__(self, source, *, data, volume=0.2):
         super().__init__(source, volume)
         self.data = data
@@ -46,14 +163,76 @@ class YTDLSource(discord.PCMVolumeTransformer):
         self.url = data.get("url")
 
     @classmethod
-    async def from_url(cls, url, *, loop=None, stream=False):
-        loop = loop or asyncio.get_event_loop()
-        data = await loop.run_in_executor(
-            None, lambda: ytdl.extract_info(url, download=not stream)
+    async def resolve(cls, url, *, stream=True, guild_id=None, timeout=None):
+        """Return the extracted info for `url`, using the stream cache if possible."""
+        video_id = extract_video_id(url) if stream else None
+        data = stream_cache.get(video_id) if video_id else None
+
+        if data is None:
+            with metrics.timer("extract", guild_id, url=url):
+                data = await extractor.extract(
+                    url, download=not stream, guild_id=guild_id, timeout=timeout
+                )
+
+            if "entries" in data:
+                data = data["entries"][0]
+
+            if stream:
+                data = stream_cache.put(video_id or data.get("id", url), data)
+        else:
+            logger.debug(f"Stream cache hit for {video_id}")
+        return data
+
+    @classmethod
+    def from_data(cls, data, *, stream=True, volume=0.2, mode="pcm"):
+        filename = data["url"] if stream else get_ytdl().prepare_filename(data)
+        if mode == "opus" and data.get("acodec") == "opus":
+            return YTDLOpusSource(filename, data=data, volume=volume)
+        return cls(
+            discord.FFmpegPCMAudio(filename, **ffmpeg_options), data=data, volume=volume
         )
 
-        if "entries" in data:
-            data = data["entries"][0]
+    @classmethod
+    def from_file(cls, path, *, data, volume=0.2):
+        """Play a locally cached file; no reconnect options are needed."""
+        return cls(
+            discord.FFmpegPCMAudio(path, options=ffmpeg_options["options"]),
+            data=data,
+            volume=volume,
+        )
+
+    @classmethod
+    async def from_url(
+        cls, url, *, stream=False, volume=0.2, mode="pcm", guild_id=None, timeout=None
+    ):
+        data = await cls.resolve(url, stream=stream, guild_id=guild_id, timeout=timeout)
+        return cls.from_data(data, stream=stream, volume=volume, mode=mode)
+
+
+class YTDLOpusSource(FirstFrameMixin, TrackedSourceMixin, discord.FFmpegOpusAudio):
+    """
+    Opus source that skips the PCM decode and Python volume transform.
+    At 100% volume the stream is copied as-is; otherwise FFmpeg applies the
+    volume filter and re-encodes, so the work stays out of the bot process.
+    Volume is fixed for the lifetime of the source.
+    """
 
-        filename = data["url"] if stream else ytdl.prepare_filename(data)
-        return cls(discord.FFmpegPCMAudio(filename, **ffmpeg_options), data=data)
+    def __init__(self, filename, *, data, volume=0.2):
+        self.data = data
+        self.title = data.get("title")
+        self.url = data.get("url")
+        self.volume = volume
+
+        if volume == 1.0:
+            codec, options = "copy", ffmpeg_options["options"]
+        else:
+            # FFmpegOpusAudio turns "opus"/"libopus" into a stream copy, which
+            # can't be filtered; any other codec (None) means encode with libopus.
+            codec = None
+            options = f"{ffmpeg_options['options']} -filter:a volume={volume}"
+        super().__init__(
+            filename,
+            codec=codec,
+            before_options=ffmpeg_options["before_options"],
+            options=options,
+        )